@@ -0,0 +1,70 @@
+"""Per-job logging cost on the worker hot path: rich console vs. the event log.
+
+A job produces three log events (claimed, completed, released). "console"
+renders them with Console.log the way workers used to; "eventlog" is what a
+worker pays now (EventLog.emit), with the background thread shipping batches
+to a rotating JSON-lines file. Both write to a scratch directory, not the
+terminal, so the numbers are formatting cost rather than terminal speed.
+
+    python benchmarks/event_log.py --jobs 20000
+"""
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from rich.console import Console
+
+from queuectl.worker.eventlog import EventLog, RotatingFileSink
+
+
+def run_console(n: int, out: Path) -> float:
+    with open(out, "w") as fh:
+        console = Console(file=fh, width=100)
+        start = time.perf_counter()
+        for i in range(n):
+            console.log(f"[worker-1] Picked job: job-{i} | cmd: echo hi")
+            console.log(f"[worker-1]  completed: job-{i}")
+            console.log("[worker-1]  released 1 dependent job(s)")
+        return time.perf_counter() - start
+
+
+def run_eventlog(n: int, out: Path, sample_rate: float) -> float:
+    sink = RotatingFileSink(out)
+    log = EventLog("worker-1", [sink], sample_rate=sample_rate)
+    start = time.perf_counter()
+    for i in range(n):
+        job = f"job-{i}"
+        log.emit("job.claimed", job=job, success=True, command="echo hi", attempt=1)
+        log.emit("job.completed", job=job, audit=True, success=True, duration_ms=1.0)
+        log.emit("job.released", job=job, audit=True, count=1)
+    elapsed = time.perf_counter() - start
+    log.close()
+    sink.close()
+    return elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=20000)
+    ap.add_argument("--dir", default=None)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        tmp = Path(tmp)
+        results = {
+            "console": run_console(args.jobs, tmp / "console.log"),
+            "eventlog": run_eventlog(args.jobs, tmp / "events.jsonl", 1.0),
+            "eventlog 1% sampled": run_eventlog(args.jobs, tmp / "sampled.jsonl", 0.01),
+        }
+        sizes = {name: os.path.getsize(tmp / f) for name, f in
+                 (("console", "console.log"), ("eventlog", "events.jsonl"), ("eventlog 1% sampled", "sampled.jsonl"))}
+
+    for name, elapsed in results.items():
+        print(f"{name:20s} {elapsed * 1e6 / args.jobs:8.1f} µs/job   {sizes[name] / 1024:8.0f} KiB written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure worker state-transition throughput for durability=strict vs batched.
+
+Runs the real claim / complete code paths against a throwaway database and
+skips command execution, so the numbers show pure queue overhead per job.
+"finish" is the part durability changes: heartbeat + completion commit per
+job (strict) vs. buffering + the amortized group flush (batched).
+
+    python benchmarks/group_commit.py --jobs 2000
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from queuectl import db
+from queuectl.worker.process import GroupCommit, _claim_next_job, _complete_job, _heartbeat
+
+
+def _fill(n: int) -> None:
+    conn = db.get_connection()
+    now = int(time.time() * 1000)
+    conn.executemany(
+        "INSERT INTO jobs(id, command, state, created_at, updated_at, next_run_at) VALUES(?, 'true', 'pending', ?, ?, ?)",
+        [(f"job-{i}", now, now, now) for i in range(n)],
+    )
+    conn.commit()
+
+
+def run_strict(n: int):
+    conn = db.get_connection()
+    finish = 0.0
+    start = time.perf_counter()
+    for _ in range(n):
+        t = time.perf_counter()
+        _heartbeat(conn, "bench", "localhost", 0)
+        finish += time.perf_counter() - t
+        job = _claim_next_job(conn, "bench", 60)
+        t = time.perf_counter()
+        _complete_job(conn, job["id"])
+        finish += time.perf_counter() - t
+    return time.perf_counter() - start, finish
+
+
+def run_batched(n: int, max_jobs: int, max_ms: int):
+    conn = db.get_connection()
+    batch = GroupCommit(conn, "bench", "localhost", 0, max_jobs, max_ms)
+    finish = 0.0
+    start = time.perf_counter()
+    for _ in range(n):
+        t = time.perf_counter()
+        if batch.due():
+            batch.flush()
+        finish += time.perf_counter() - t
+        job = _claim_next_job(conn, "bench", 60)
+        t = time.perf_counter()
+        batch.complete(job)
+        finish += time.perf_counter() - t
+    t = time.perf_counter()
+    batch.flush()
+    finish += time.perf_counter() - t
+    return time.perf_counter() - start, finish
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=2000)
+    ap.add_argument("--dir", default=None, help="Where to put the scratch DB (pick the disk you deploy on)")
+    ap.add_argument("--batch-max-jobs", type=int, default=50)
+    ap.add_argument("--batch-max-ms", type=int, default=200)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        results = {}
+        for mode in ("strict", "batched"):
+            db._db_path = Path(tmp) / f"{mode}.db"
+            db.init_db()
+            _fill(args.jobs)
+            if mode == "strict":
+                results[mode] = run_strict(args.jobs)
+            else:
+                results[mode] = run_batched(args.jobs, args.batch_max_jobs, args.batch_max_ms)
+
+    for mode, (total, finish) in results.items():
+        print(
+            f"{mode:8s} {args.jobs / total:7.0f} jobs/s total   "
+            f"finish {finish * 1e6 / args.jobs:7.1f} µs/job"
+        )
+
+
+if __name__ == "__main__":
+    main()
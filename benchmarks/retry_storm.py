@@ -0,0 +1,103 @@
+"""Simulate a retry storm and compare retry policies.
+
+N jobs share a dependency that is down for the first `--outage` seconds, so
+every attempt before then fails with the same error. Each failure is
+rescheduled with the real policy code (queuectl.retry.backoff_seconds), and
+optionally passed through the real circuit breaker (apply_breaker, on an
+in-memory database). Workers are assumed unlimited, so the number of jobs
+coming due in the same 100 ms is the number of workers racing for the claim
+lock at that moment; "peak" is the worst such bucket of retries.
+
+    python benchmarks/retry_storm.py --jobs 2000 --outage 20
+"""
+from __future__ import annotations
+import argparse
+import heapq
+import random
+import sqlite3
+from collections import Counter
+
+from queuectl.db import TABLES
+from queuectl.retry import Breaker, apply_breaker, backoff_seconds
+
+BUCKET_MS = 100
+SPARK = " ▁▂▃▄▅▆▇█"
+
+
+def simulate(policy: str, args, breaker: Breaker | None):
+    rng = random.Random(args.seed)
+    conn = sqlite3.connect(":memory:")
+    conn.execute(TABLES["retry_breakers"].format(name="retry_breakers"))
+
+    outage_ms = int(args.outage * 1000)
+    # (due_ms, job, attempts so far, previous delay in seconds)
+    queue = [(0, j, 0, None) for j in range(args.jobs)]
+    heapq.heapify(queue)
+    claims: Counter = Counter()
+    attempts_total = dead = 0
+    drained = 0
+
+    while queue:
+        due, job, attempts, prev = heapq.heappop(queue)
+        if attempts:  # the first wave is the outage itself; retries are what policies shape
+            claims[due // BUCKET_MS] += 1
+        attempts_total += 1
+        attempts += 1
+        if due >= outage_ms:
+            drained = max(drained, due)
+            continue
+        if attempts >= args.max_retries:
+            dead += 1
+            drained = max(drained, due)
+            if breaker is not None:
+                apply_breaker(conn, breaker, "dependency down", due, None, rng)
+            continue
+        delay = backoff_seconds(policy, attempts, args.base, args.cap, prev, rng)
+        next_due = due + int(delay * 1000)
+        if breaker is not None:
+            next_due = apply_breaker(conn, breaker, "dependency down", due, next_due, rng)
+        heapq.heappush(queue, (next_due, job, attempts, delay))
+
+    return claims, attempts_total, dead, drained
+
+
+def sparkline(claims: Counter, seconds: int, width: int = 60) -> str:
+    step = max(1, seconds * 1000 // BUCKET_MS // width)
+    cols = [max(claims.get(b, 0) for b in range(i, i + step)) for i in range(0, step * width, step)]
+    top = max(cols) or 1
+    return "".join(SPARK[min(len(SPARK) - 1, round(c / top * (len(SPARK) - 1)))] for c in cols)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=2000)
+    ap.add_argument("--outage", type=float, default=20.0, help="Seconds the shared dependency is down")
+    ap.add_argument("--max-retries", type=int, default=10)
+    ap.add_argument("--base", type=float, default=2, help="backoff_base")
+    ap.add_argument("--cap", type=float, default=300, help="max_backoff_seconds")
+    ap.add_argument("--breaker-threshold", type=int, default=100)
+    ap.add_argument("--breaker-window", type=float, default=10)
+    ap.add_argument("--breaker-cooldown", type=float, default=30)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    breaker = Breaker(args.breaker_threshold, int(args.breaker_window * 1000), int(args.breaker_cooldown * 1000))
+    runs = [(p, None) for p in ("exponential", "full_jitter", "decorrelated_jitter", "linear", "fixed")]
+    runs += [("exponential", breaker), ("full_jitter", breaker)]
+
+    results = [(p, b, *simulate(p, args, b)) for p, b in runs]
+    horizon = int(max(r[5] for r in results) / 1000) + 1
+
+    print(f"{args.jobs} jobs, dependency down for {args.outage:g}s, max_retries={args.max_retries}, "
+          f"peak = most retries due in one {BUCKET_MS} ms bucket")
+    print(f"{'policy':30s} {'attempts':>8s} {'dead':>5s} {'peak':>5s} {'drained':>8s}   due over time (0-{horizon}s)")
+    for policy, b, claims, attempts, dead, drained in results:
+        name = policy + (" + breaker" if b else "")
+        print(
+            f"{name:30s} {attempts:8d} {dead:5d} {max(claims.values()):5d} {drained / 1000:7.1f}s   "
+            f"{sparkline(claims, horizon)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
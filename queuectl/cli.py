@@ -1,6 +1,6 @@
 from __future__ import annotations
 import sys
-from typing import Optional
+from typing import List, Optional
 
 import typer
 from rich.console import Console
@@ -62,6 +62,10 @@ def enqueue(
     priority: int = typer.Option(5, "--priority", "-p", help="Lower number = higher priority (default = 5)"),
     run_at: str = typer.Option(None, "--run-at", help="Schedule timestamp (YYYY-MM-DD HH:MM:SS)"),
     delay: int = typer.Option(None, "--delay", help="Delay execution in seconds"),
+    depends_on: List[str] = typer.Option(None, "--depends-on", "-d", help="Parent job id (repeatable); job waits until all complete"),
+    dedupe_key: str = typer.Option(None, "--dedupe-key", "-k", help="Absorb repeat submissions with this key (see dedupe_ttl_seconds)"),
+    coalesce: bool = typer.Option(False, "--coalesce", help="Merge repeats into the existing job while it has not started"),
+    retry_policy: str = typer.Option(None, "--retry-policy", help="exponential | full_jitter | decorrelated_jitter | linear | fixed (default: retry_policy config)"),
 ):
     from .enqueue import enqueue_job
     import json, os
@@ -70,12 +74,12 @@ def enqueue(
             console.print(f"[red]File not found[/]: {file}")
             raise typer.Exit(1)
         with open(file, "r") as f:
-            enqueue_job(f.read())
+            enqueue_job(f.read(), depends_on=depends_on, dedupe_key=dedupe_key, coalesce=coalesce, retry_policy=retry_policy)
         return
     if not job_id or not command:
         console.print("[red]Either --file OR (--id AND --cmd) must be provided.[/]")
         raise typer.Exit(1)
-    enqueue_job(json.dumps({"id": job_id, "command": command}), max_retries=max_retries, priority=priority, run_at=run_at, delay=delay)
+    enqueue_job(json.dumps({"id": job_id, "command": command}), max_retries=max_retries, priority=priority, run_at=run_at, delay=delay, depends_on=depends_on, dedupe_key=dedupe_key, coalesce=coalesce, retry_policy=retry_policy)
 
 
 # ---------------------------
@@ -88,9 +92,11 @@ app.add_typer(worker_app, name="worker")
 @worker_app.command("start")
 def worker_start(
     count: int = typer.Option(1, "--count", "-n", help="Number of worker processes"),
+    profile: bool = typer.Option(False, "--profile", help="Record per-phase and per-SQL-statement timings to ~/.queuectl/profiles"),
+    cprofile: bool = typer.Option(False, "--cprofile", help="Also dump a cProfile .prof per worker (implies --profile)"),
 ):
     from .worker.supervisor import start_workers
-    start_workers(count)
+    start_workers(count, profile=profile, cprofile=cprofile)
 
 
 @worker_app.command("stop")
@@ -99,6 +105,73 @@ def worker_stop():
     request_stop()
 
 
+# ---------------------------
+# schedule group
+# ---------------------------
+schedule_app = typer.Typer(help="Recurring jobs (cron or fixed interval)")
+app.add_typer(schedule_app, name="schedule")
+
+
+@schedule_app.command("add")
+def _schedule_add(
+    schedule_id: str = typer.Option(..., "--id", "-i"),
+    command: str = typer.Option(..., "--cmd", "-c"),
+    cron: str = typer.Option(None, "--cron", help='5-field cron expression in UTC, e.g. "*/5 * * * *" or @hourly'),
+    every: int = typer.Option(None, "--every", help="Fire every N seconds"),
+    priority: int = typer.Option(5, "--priority", "-p"),
+    max_retries: Optional[int] = typer.Option(None, "--max-retries", "-r"),
+    misfire: str = typer.Option("run_once", "--misfire", help="Missed fire times: run_once | run_all | skip"),
+    overlap: str = typer.Option("allow", "--overlap", help="Previous run unfinished: allow | skip"),
+):
+    from .commands.schedule import schedule_add
+    schedule_add(schedule_id, command, cron, every, priority, max_retries, misfire, overlap)
+
+
+@schedule_app.command("list")
+def _schedule_list():
+    from .commands.schedule import schedule_list
+    schedule_list()
+
+
+@schedule_app.command("remove")
+def _schedule_remove(schedule_id: str = typer.Argument(...)):
+    from .commands.schedule import schedule_remove
+    schedule_remove(schedule_id)
+
+
+@schedule_app.command("pause")
+def _schedule_pause(schedule_id: str = typer.Argument(...)):
+    from .commands.schedule import schedule_set_enabled
+    schedule_set_enabled(schedule_id, False)
+
+
+@schedule_app.command("resume")
+def _schedule_resume(schedule_id: str = typer.Argument(...)):
+    from .commands.schedule import schedule_set_enabled
+    schedule_set_enabled(schedule_id, True)
+
+
+# ---------------------------
+# profile group
+# ---------------------------
+profile_app = typer.Typer(help="Inspect worker profiles recorded with `worker start --profile`")
+app.add_typer(profile_app, name="profile")
+
+
+@profile_app.command("report")
+def _profile_report(
+    top: int = typer.Option(15, "--top", help="Rows per table"),
+):
+    from .commands.profile import profile_report
+    profile_report(top)
+
+
+@profile_app.command("clear")
+def _profile_clear():
+    from .commands.profile import profile_clear
+    profile_clear()
+
+
 # ---------------------------
 # status
 # ---------------------------
@@ -115,6 +188,17 @@ def _list(state: str = typer.Option(..., "--state", help="Job state to filter"))
     from .commands.list_jobs import list_jobs
     list_jobs(state)
 
+# ---------------------------
+# graph
+# ---------------------------
+@app.command("graph")
+def _graph(
+    job_id: str = typer.Argument(..., help="Job id to show dependencies for"),
+    depth: int = typer.Option(5, "--depth", help="How many levels of dependents to expand"),
+):
+    from .commands.graph import graph
+    graph(job_id, depth)
+
 # ---------------------------
 # dlq
 # ---------------------------
@@ -122,14 +206,37 @@ dlq_app = typer.Typer(help="Dead Letter Queue commands")
 app.add_typer(dlq_app, name="dlq")
 
 @dlq_app.command("list")
-def _dlq_list():
+def _dlq_list(limit: int = typer.Option(100, "--limit", "-n", help="Show at most N jobs (newest first)")):
     from .commands.dlq import dlq_list
-    dlq_list()
+    dlq_list(limit)
 
 @dlq_app.command("retry")
-def _dlq_retry(job_id: str = typer.Argument(...)):
+def _dlq_retry(
+    job_id: Optional[str] = typer.Argument(None, help="Dead job to re-queue (or use --all / a filter)"),
+    all_: bool = typer.Option(False, "--all", help="Re-queue every dead job"),
+    error_like: str = typer.Option(None, "--error-like", help="last_error contains this text"),
+    error_class: str = typer.Option(None, "--class", help="Exact error class, as shown by `dlq summary`"),
+    older_than: str = typer.Option(None, "--older-than", help="Died more than this long ago, e.g. 30m, 2h, 7d"),
+    rate: float = typer.Option(None, "--rate", help="Re-queued jobs become due at most this many per second (0 = all at once; default dlq_redrive_rate)"),
+):
     from .commands.dlq import dlq_retry
-    dlq_retry(job_id)
+    dlq_retry(job_id, all_, error_like, error_class, older_than, rate)
+
+@dlq_app.command("purge")
+def _dlq_purge(
+    job_id: Optional[str] = typer.Argument(None, help="Dead job to delete (or use --all / a filter)"),
+    all_: bool = typer.Option(False, "--all", help="Delete every dead job"),
+    error_like: str = typer.Option(None, "--error-like", help="last_error contains this text"),
+    error_class: str = typer.Option(None, "--class", help="Exact error class, as shown by `dlq summary`"),
+    older_than: str = typer.Option(None, "--older-than", help="Died more than this long ago, e.g. 30m, 2h, 7d"),
+):
+    from .commands.dlq import dlq_purge
+    dlq_purge(job_id, all_, error_like, error_class, older_than)
+
+@dlq_app.command("summary")
+def _dlq_summary(top: int = typer.Option(20, "--top", help="Number of error classes to show")):
+    from .commands.dlq import dlq_summary
+    dlq_summary(top)
     
 if __name__ == "__main__":
     app()
\ No newline at end of file
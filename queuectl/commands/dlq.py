@@ -1,18 +1,27 @@
 from __future__ import annotations
+from typing import List, Optional, Tuple
 from rich.console import Console
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
 from rich.table import Table
 from ..db import get_connection
+from ..config import get_value
 from ..constants import JobState
-from ..util.time import utcnow_iso
+from ..deps import failure_policy, on_parent_purged
+from ..util.fingerprint import error_fingerprint
+from ..util.time import now_ms, parse_duration, fmt_ts
 
 console = Console()
 
+# rows per statement/transaction for bulk retry and purge
+CHUNK_ROWS = 500
 
-def dlq_list():
+
+def dlq_list(limit: int = 100):
     conn = get_connection()
+    total = conn.execute("SELECT COUNT(*) FROM jobs WHERE state=?", (JobState.DEAD,)).fetchone()[0]
     rows = conn.execute(
-        "SELECT id, attempts, last_error FROM jobs WHERE state=? ORDER BY updated_at DESC",
-        (JobState.DEAD,),
+        "SELECT id, attempts, last_error FROM jobs WHERE state=? ORDER BY updated_at DESC LIMIT ?",
+        (JobState.DEAD, limit),
     ).fetchall()
 
     table = Table(title="Dead Letter Queue (DLQ)")
@@ -24,15 +33,224 @@ def dlq_list():
         table.add_row(r["id"], str(r["attempts"]), r["last_error"] or "")
 
     console.print(table)
+    if total > len(rows):
+        console.print(f"[dim]showing {len(rows)} of {total} (newest first); see `queuectl dlq summary`[/]")
+
+
+# -----------------------
+# Selecting dead jobs for bulk operations
+# -----------------------
+def _selection(
+    job_id: Optional[str], all_: bool, error_like: Optional[str],
+    error_class: Optional[str], older_than: Optional[str],
+) -> Optional[Tuple[str, List]]:
+    """Build the WHERE clause for the chosen dead jobs, or print why not and return None."""
+    filters = error_like is not None or error_class is not None or older_than is not None
+    if job_id is not None and (all_ or filters):
+        console.print("[red]Give either a job id or --all/--error-like/--class/--older-than, not both[/]")
+        return None
+    if job_id is None and not (all_ or filters):
+        console.print("[red]Give a job id, --all, or a filter (--error-like, --class, --older-than)[/]")
+        return None
+    if all_ and filters:
+        console.print("[red]--all selects every dead job; drop it to filter[/]")
+        return None
+
+    clauses, params = ["state = ?"], [JobState.DEAD.value]
+    if job_id is not None:
+        clauses.append("id = ?")
+        params.append(job_id)
+    if error_like is not None:
+        # substring match: % and _ are taken literally
+        escaped = error_like.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        clauses.append("last_error LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+    if error_class is not None:
+        clauses.append("error_fp = ?")
+        params.append(error_class)
+    if older_than is not None:
+        try:
+            seconds = parse_duration(older_than)
+        except ValueError as e:
+            console.print(f"[red]{e}[/]")
+            return None
+        clauses.append("updated_at < ?")
+        params.append(now_ms() - int(seconds * 1000))
+    return " AND ".join(clauses), params
+
+
+def _progress(disable: bool = False) -> Progress:
+    return Progress(
+        TextColumn("{task.description}"), BarColumn(), MofNCompleteColumn(), TimeElapsedColumn(),
+        console=console, disable=disable,
+    )
+
+
+# -----------------------
+# retry
+# -----------------------
+def dlq_retry(
+    job_id: Optional[str] = None,
+    all_: bool = False,
+    error_like: Optional[str] = None,
+    error_class: Optional[str] = None,
+    older_than: Optional[str] = None,
+    rate: Optional[float] = None,
+    chunk: int = CHUNK_ROWS,
+):
+    sel = _selection(job_id, all_, error_like, error_class, older_than)
+    if sel is None:
+        return
+    where, params = sel
+
+    if rate is None:
+        try:
+            rate = float(get_value("dlq_redrive_rate") or 0)
+        except ValueError:
+            rate = 0.0
+    if rate < 0:
+        console.print("[red]--rate must be >= 0[/]")
+        return
+    # re-driven jobs become due one every ms_per_job, so workers aren't stampeded
+    ms_per_job = 1000.0 / rate if rate and job_id is None else 0.0
+
+    conn = get_connection()
+    total = conn.execute(f"SELECT COUNT(*) FROM jobs WHERE {where}", params).fetchone()[0]
+    if total == 0:
+        what = f"Job {job_id} is not" if job_id is not None else "No matching jobs are"
+        console.print(f"[yellow]{what} in the DLQ[/]")
+        return
+
+    start = now_ms()
+    done = 0
+    with _progress(disable=job_id is not None) as progress:
+        task = progress.add_task("re-queueing", total=total)
+        while done < total:
+            conn.execute("BEGIN IMMEDIATE")
+            ids = [r[0] for r in conn.execute(
+                f"SELECT id FROM jobs WHERE {where} LIMIT ?", (*params, min(chunk, total - done))
+            )]
+            if not ids:
+                conn.rollback()
+                break
+            # one statement and one commit per chunk; jobs with unfinished parents go back to waiting
+            updated = conn.executemany(
+                """
+                UPDATE jobs
+                SET state = CASE WHEN remaining_deps > 0 THEN ? ELSE ? END,
+                    attempts = 0, last_error = NULL, error_fp = NULL, retry_delay_ms = NULL, updated_at = ?,
+                    next_run_at = ?
+                WHERE id = ? AND state = ?
+                """,
+                [(JobState.WAITING, JobState.PENDING, start, start + int((done + n) * ms_per_job),
+                  job, JobState.DEAD) for n, job in enumerate(ids)],
+            ).rowcount
+            conn.commit()
+            done += updated
+            progress.advance(task, updated)
 
+    if job_id is not None:
+        console.print(f"[green] Job {job_id} moved back to queue[/]")
+        return
+    msg = f"[green]Re-queued {done} dead job(s)[/]"
+    if ms_per_job:
+        last_due = start + int((done - 1) * ms_per_job)
+        msg += f", paced at {rate:g}/s (last one due {fmt_ts(last_due)} UTC)"
+    console.print(msg)
 
-def dlq_retry(job_id: str):
+
+# -----------------------
+# purge
+# -----------------------
+def dlq_purge(
+    job_id: Optional[str] = None,
+    all_: bool = False,
+    error_like: Optional[str] = None,
+    error_class: Optional[str] = None,
+    older_than: Optional[str] = None,
+    chunk: int = CHUNK_ROWS,
+):
+    sel = _selection(job_id, all_, error_like, error_class, older_than)
+    if sel is None:
+        return
+    where, params = sel
+
+    dep_policy = failure_policy(get_value("dependency_failure_policy"))
+    conn = get_connection()
+    total = conn.execute(f"SELECT COUNT(*) FROM jobs WHERE {where}", params).fetchone()[0]
+    if total == 0:
+        console.print("[yellow]No matching jobs in the DLQ[/]")
+        return
+
+    done = settled = 0
+    with _progress(disable=job_id is not None) as progress:
+        task = progress.add_task("purging", total=total)
+        while done < total:
+            conn.execute("BEGIN IMMEDIATE")
+            ids = [r[0] for r in conn.execute(
+                f"SELECT id FROM jobs WHERE {where} LIMIT ?", (*params, min(chunk, total - done))
+            )]
+            if not ids:
+                conn.rollback()
+                break
+            now = now_ms()
+            for parent_id in ids:
+                # waiting children must not keep waiting on a parent that is about to vanish
+                settled += on_parent_purged(conn, parent_id, now, dep_policy)
+            marks = ",".join("?" * len(ids))
+            # drop their dependency edges too; dedupe keys pointing at them are taken over lazily
+            conn.execute(f"DELETE FROM job_deps WHERE child_id IN ({marks})", ids)
+            conn.execute(f"DELETE FROM job_deps WHERE parent_id IN ({marks})", ids)
+            deleted = conn.execute(f"DELETE FROM jobs WHERE id IN ({marks})", ids).rowcount
+            conn.commit()
+            done += deleted
+            progress.advance(task, deleted)
+
+    msg = f"[green]Purged {done} dead job(s)[/]"
+    if settled:
+        verb = "released" if dep_policy == "ignore" else "moved to the DLQ"
+        msg += f"; {settled} dependent job(s) {verb}"
+    console.print(msg)
+
+
+# -----------------------
+# summary
+# -----------------------
+def dlq_summary(top: int = 20):
     conn = get_connection()
 
-    # Reset values
+    # jobs killed by older workers (or mid-migration) have no fingerprint yet
+    conn.create_function("error_fingerprint", 1, error_fingerprint, deterministic=True)
     conn.execute(
-        "UPDATE jobs SET state=?, attempts=0, next_run_at=?, last_error=NULL WHERE id=? AND state=?",
-        (JobState.PENDING, utcnow_iso(), job_id, JobState.DEAD),
+        "UPDATE jobs SET error_fp = error_fingerprint(last_error) "
+        "WHERE state = ? AND error_fp IS NULL AND last_error IS NOT NULL",
+        (JobState.DEAD,),
     )
     conn.commit()
-    console.print(f"[green] Job {job_id} moved back to queue[/]")
\ No newline at end of file
+
+    # served from idx_jobs_state_fp alone
+    rows = conn.execute(
+        """
+        SELECT error_fp, COUNT(*) AS n, MIN(updated_at) AS first, MAX(updated_at) AS last
+        FROM jobs WHERE state = ?
+        GROUP BY error_fp
+        ORDER BY n DESC
+        """,
+        (JobState.DEAD,),
+    ).fetchall()
+    if not rows:
+        console.print("[green]The DLQ is empty[/]")
+        return
+
+    total = sum(r["n"] for r in rows)
+    table = Table(title=f"DLQ by error class ({total} dead jobs, {len(rows)} classes)")
+    table.add_column("jobs", justify="right")
+    table.add_column("error class")
+    table.add_column("first died")
+    table.add_column("last died")
+    for r in rows[:top]:
+        table.add_row(str(r["n"]), r["error_fp"] or "(no error)", fmt_ts(r["first"]), fmt_ts(r["last"]))
+    console.print(table)
+    if len(rows) > top:
+        console.print(f"[dim]{len(rows) - top} smaller class(es) not shown[/]")
+    console.print("[dim]Act on one class with `queuectl dlq retry --class '<error class>'` (or `dlq purge`)[/]")
@@ -0,0 +1,61 @@
+from __future__ import annotations
+from rich.console import Console
+from rich.tree import Tree
+from ..db import get_connection
+from ..deps import parents_of, children_of
+
+console = Console()
+
+STATE_STYLE = {
+    "waiting": "magenta",
+    "pending": "yellow",
+    "processing": "cyan",
+    "completed": "green",
+    "failed": "red",
+    "dead": "bold red",
+}
+
+
+def _label(job_id: str, state: str, extra: str = "") -> str:
+    style = STATE_STYLE.get(state, "white")
+    return f"{job_id} [{style}]{state}[/]{extra}"
+
+
+def graph(job_id: str, depth: int = 5):
+    conn = get_connection()
+    job = conn.execute("SELECT id, state, remaining_deps FROM jobs WHERE id=?", (job_id,)).fetchone()
+    if not job:
+        console.print(f"[red]Job not found[/]: {job_id}")
+        return
+
+    extra = f" (waiting on {job['remaining_deps']})" if job["remaining_deps"] else ""
+    root = Tree(_label(job["id"], job["state"], extra))
+
+    parents = parents_of(conn, job_id)
+    if parents:
+        up = root.add("[dim]depends on[/]")
+        for p in parents:
+            up.add(_label(p["id"], p["state"], "" if p["satisfied"] else " [dim]· blocking[/]"))
+
+    # descendants, expanded lazily level by level; a shared child is shown once
+    seen = {job_id}
+
+    def _walk(node: Tree, parent_id: str, level: int) -> None:
+        for c in children_of(conn, parent_id):
+            if c["id"] in seen:
+                node.add(f"{c['id']} [dim]↺ (shown above)[/]")
+                continue
+            seen.add(c["id"])
+            extra = f" (waiting on {c['remaining_deps']})" if c["remaining_deps"] else ""
+            child = node.add(_label(c["id"], c["state"], extra))
+            if level < depth:
+                _walk(child, c["id"], level + 1)
+            elif children_of(conn, c["id"]):
+                child.add("[dim]…[/]")
+
+    down = Tree("[dim]dependents[/]")
+    _walk(down, job_id, 1)
+    if down.children:
+        root.children.append(down)
+
+    console.print(root)
@@ -3,6 +3,7 @@ from rich.console import Console
 from rich.table import Table
 from ..db import get_connection
 from ..constants import JobState
+from ..util.time import fmt_ts
 
 console = Console()
 
@@ -22,10 +23,10 @@ def list_jobs(state: str):
     table.add_column("id")
     table.add_column("state")
     table.add_column("attempts")
-    table.add_column("next_run_at")
+    table.add_column("next_run_at (UTC)")
     table.add_column("last_error")
 
     for r in rows:
-        table.add_row(r["id"], r["state"], str(r["attempts"]), r["next_run_at"], (r["last_error"] or ""))
+        table.add_row(r["id"], r["state"], str(r["attempts"]), fmt_ts(r["next_run_at"]), (r["last_error"] or ""))
 
     console.print(table)
\ No newline at end of file
@@ -0,0 +1,71 @@
+from __future__ import annotations
+import io
+import pstats
+from rich.console import Console
+from rich.table import Table
+from ..worker.process import profiles_dir
+from ..worker.profiling import load_profiles, merge_stats
+
+console = Console()
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}"
+
+
+def profile_report(top: int = 15):
+    out = profiles_dir()
+    profiles = load_profiles(out) if out.exists() else []
+    if not profiles:
+        console.print(f"[yellow]No profiles found in {out}. Run `queuectl worker start --profile` first.[/]")
+        return
+
+    jobs = sum(p.get("jobs", 0) for p in profiles)
+    wall = sum(p.get("wall_s", 0.0) for p in profiles)
+    console.print(f"[bold]{len(profiles)} worker profile(s)[/], {jobs} jobs, {wall:.1f}s worker wall time")
+
+    # phases, ranked by total time
+    phases = merge_stats(profiles, "phases")
+    table = Table(title="Worker phases (all workers)")
+    for col in ("phase", "calls", "total ms", "% of wall", "avg ms", "max ms", "ms/job"):
+        table.add_column(col, justify="left" if col == "phase" else "right")
+    for name, s in sorted(phases.items(), key=lambda kv: kv[1]["total_s"], reverse=True)[:top]:
+        table.add_row(
+            name, str(s["count"]), _ms(s["total_s"]),
+            f"{100 * s['total_s'] / wall:.1f}" if wall else "—",
+            _ms(s["total_s"] / s["count"]) if s["count"] else "—",
+            _ms(s["max_s"]),
+            _ms(s["total_s"] / jobs) if jobs else "—",
+        )
+    console.print(table)
+
+    # SQL statements, ranked by total time; busy wait is time spent waiting for the lock
+    stmts = merge_stats(profiles, "statements")
+    table = Table(title="SQL statements (slowest total first)")
+    for col in ("statement", "calls", "total ms", "busy wait ms", "avg ms", "max ms"):
+        table.add_column(col, justify="left" if col == "statement" else "right")
+    for sql, s in sorted(stmts.items(), key=lambda kv: kv[1]["total_s"], reverse=True)[:top]:
+        table.add_row(
+            sql, str(s["count"]), _ms(s["total_s"]), _ms(s["wait_s"]),
+            _ms(s["total_s"] / s["count"]) if s["count"] else "—", _ms(s["max_s"]),
+        )
+    console.print(table)
+
+    # cProfile dumps, merged
+    prof_files = sorted(str(p) for p in out.glob("worker-*.prof"))
+    if prof_files:
+        buf = io.StringIO()
+        stats = pstats.Stats(*prof_files, stream=buf)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(top)
+        console.print(f"[bold]cProfile ({len(prof_files)} file(s), by cumulative time)[/]")
+        console.print(buf.getvalue(), markup=False, highlight=False)
+
+
+def profile_clear():
+    out = profiles_dir()
+    removed = 0
+    if out.exists():
+        for p in list(out.glob("worker-*.json")) + list(out.glob("worker-*.prof")):
+            p.unlink()
+            removed += 1
+    console.print(f"[green]Removed {removed} profile file(s)[/]")
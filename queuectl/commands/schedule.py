@@ -0,0 +1,107 @@
+from __future__ import annotations
+from typing import Optional
+from rich.console import Console
+from rich.table import Table
+from ..db import get_connection
+from ..constants import MISFIRE_POLICIES, OVERLAP_POLICIES
+from ..util.time import now_ms, fmt_ts
+from ..worker.scheduler import first_fire
+
+console = Console()
+
+
+def schedule_add(
+    schedule_id: str,
+    command: str,
+    cron: Optional[str] = None,
+    every: Optional[int] = None,
+    priority: int = 5,
+    max_retries: Optional[int] = None,
+    misfire: str = "run_once",
+    overlap: str = "allow",
+):
+    if bool(cron) == bool(every):
+        console.print("[red]Provide exactly one of --cron or --every.[/]")
+        return
+    if every is not None and every <= 0:
+        console.print("[red]--every must be a positive number of seconds[/]")
+        return
+    if misfire not in MISFIRE_POLICIES:
+        console.print(f"[red]Invalid misfire policy. Must be one of: {', '.join(MISFIRE_POLICIES)}")
+        return
+    if overlap not in OVERLAP_POLICIES:
+        console.print(f"[red]Invalid overlap policy. Must be one of: {', '.join(OVERLAP_POLICIES)}")
+        return
+
+    now = now_ms()
+    try:
+        next_fire = first_fire(cron, every, now)
+    except ValueError as e:
+        console.print(f"[red]{e}[/]")
+        return
+
+    conn = get_connection()
+    try:
+        conn.execute(
+            """
+            INSERT INTO schedules(id, command, cron, interval_seconds, priority, max_retries,
+                                  misfire_policy, overlap_policy, next_fire_at, created_at, updated_at)
+            VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (schedule_id, command, cron, every, priority, max_retries,
+             misfire, overlap, next_fire, now, now),
+        )
+        conn.commit()
+    except Exception as e:
+        console.print(f"[red]Failed to add schedule:[/] {e}")
+        return
+    console.print(f"[green]Schedule added:[/] {schedule_id}  (next fire {fmt_ts(next_fire)} UTC)")
+
+
+def schedule_list():
+    conn = get_connection()
+    rows = conn.execute("SELECT * FROM schedules ORDER BY next_fire_at").fetchall()
+
+    table = Table(title="Schedules")
+    table.add_column("id")
+    table.add_column("when")
+    table.add_column("command")
+    table.add_column("next_fire_at (UTC)")
+    table.add_column("last_fired_at")
+    table.add_column("misfire/overlap")
+    table.add_column("enabled")
+
+    for r in rows:
+        when = r["cron"] or f"every {r['interval_seconds']}s"
+        table.add_row(
+            r["id"], when, r["command"], fmt_ts(r["next_fire_at"]), fmt_ts(r["last_fired_at"]),
+            f"{r['misfire_policy']}/{r['overlap_policy']}", "yes" if r["enabled"] else "no",
+        )
+
+    console.print(table)
+
+
+def schedule_remove(schedule_id: str):
+    conn = get_connection()
+    deleted = conn.execute("DELETE FROM schedules WHERE id=?", (schedule_id,)).rowcount
+    conn.commit()
+    if not deleted:
+        console.print(f"[red]Schedule not found[/]: {schedule_id}")
+        return
+    console.print(f"[green]Schedule removed:[/] {schedule_id}")
+
+
+def schedule_set_enabled(schedule_id: str, enabled: bool):
+    conn = get_connection()
+    now = now_ms()
+    row = conn.execute("SELECT cron, interval_seconds FROM schedules WHERE id=?", (schedule_id,)).fetchone()
+    if not row:
+        console.print(f"[red]Schedule not found[/]: {schedule_id}")
+        return
+    # resuming starts from the next fire time instead of replaying the pause
+    conn.execute(
+        "UPDATE schedules SET enabled=?, next_fire_at=?, updated_at=? WHERE id=?",
+        (1 if enabled else 0, first_fire(row["cron"], row["interval_seconds"], now), now, schedule_id),
+    )
+    conn.commit()
+    console.print(f"[green]Schedule {'resumed' if enabled else 'paused'}:[/] {schedule_id}")
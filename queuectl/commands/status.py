@@ -1,8 +1,8 @@
 from __future__ import annotations
-from datetime import datetime, timezone
 from rich.console import Console
 from rich.table import Table
 from ..db import get_connection
+from ..util.time import now_ms
 
 console = Console()
 
@@ -32,14 +32,9 @@ def status():
     worker_table.add_column("id")
     worker_table.add_column("last seen (sec ago)")
 
-    now = datetime.now(timezone.utc)
+    now = now_ms()
     for w in workers:
-        last = datetime.fromisoformat(w["last_heartbeat_at"])
-
-        if last.tzinfo is None:
-            last = last.replace(tzinfo=timezone.utc)
-
-        age = int((now - last).total_seconds())
+        age = (now - w["last_heartbeat_at"]) // 1000
         worker_table.add_row(w["id"], str(age))
 
     console.print(worker_table)
\ No newline at end of file
@@ -1,6 +1,7 @@
 from enum import Enum
 
 class JobState(str, Enum):
+    WAITING = "waiting"
     PENDING = "pending"
     PROCESSING = "processing"
     COMPLETED = "completed"
@@ -14,8 +15,41 @@ DEFAULTS = {
 "poll_interval_ms": "500",
 "lease_seconds": "60",
 "max_backoff_seconds": "300",
+"dependency_failure_policy": "cascade",
+"scheduler_enabled": "1",
+"schedule_misfire_grace_seconds": "60",
+"dedupe_ttl_seconds": "3600",
+"durability": "strict",
+"batch_max_jobs": "50",
+"batch_max_ms": "200",
+"dlq_redrive_rate": "50",
+"retry_policy": "full_jitter",
+"retry_breaker_threshold": "0",
+"retry_breaker_window_seconds": "10",
+"retry_breaker_cooldown_seconds": "30",
+"log_level": "info",
+"log_sample_rate": "1.0",
+"log_console": "1",
+"log_flush_ms": "200",
+"log_max_bytes": "10485760",
+"log_backups": "5",
 }
 
 
+# What happens to waiting children when a parent lands in the DLQ
+DEPENDENCY_FAILURE_POLICIES = ("cascade", "ignore", "block")
+
+# How the delay before a failed job's next attempt is computed (see retry.py)
+RETRY_POLICIES = ("exponential", "full_jitter", "decorrelated_jitter", "linear", "fixed")
+
+
 APP_DIRNAME = ".queuectl"
-DB_FILENAME = "queue.db"
\ No newline at end of file
+DB_FILENAME = "queue.db"
+PROFILES_DIRNAME = "profiles"
+LOGS_DIRNAME = "logs"
+EVENTS_FILENAME = "events.jsonl"
+
+# Recurring schedules: what to do with fire times missed while no supervisor ran,
+# and whether a new instance may start while the previous one is unfinished
+MISFIRE_POLICIES = ("run_once", "run_all", "skip")
+OVERLAP_POLICIES = ("allow", "skip")
@@ -1,11 +1,11 @@
 from __future__ import annotations
 import os
 import sqlite3
+from contextlib import closing
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Optional
 
 from .constants import APP_DIRNAME, DB_FILENAME, DEFAULTS
-from .util.time import utcnow_iso
 
 _app_dir: Optional[Path] = None
 _db_path: Optional[Path] = None
@@ -27,6 +27,9 @@ def db_path() -> Path:
 
 
 def get_connection() -> sqlite3.Connection:
+    # Close short-lived connections explicitly (`with closing(...)`): on their own they
+    # linger until a GC pass, and closing any handle on the DB file drops this process's
+    # POSIX locks on it, including those of a worker's long-lived connection.
     conn = sqlite3.connect(db_path())
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL;")
@@ -34,46 +37,154 @@ def get_connection() -> sqlite3.Connection:
     return conn
 
 
-def init_db() -> None:
-    """Create tables if they don't exist and seed default config."""
-    conn = get_connection()
-    cur = conn.cursor()
+def _ensure_column(cur: sqlite3.Cursor, table: str, column: str, decl: str) -> None:
+    """Add a column to an existing table (older DBs predate it)."""
+    cols = [r[1] for r in cur.execute(f"PRAGMA table_info({table})").fetchall()]
+    if cols and column not in cols:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+# PRAGMA user_version: 0 = text timestamps (pre-versioning), 1 = epoch-ms integers,
+# 2 = jobs.error_fp (normalized last_error, for grouping the DLQ),
+# 3 = per-job retry policy + retry_breakers
+SCHEMA_VERSION = 3
 
-    # migrations (idempotent)
-    cur.executescript(
-        """
-        CREATE TABLE IF NOT EXISTS jobs (
+# Table DDL. {name} lets a migration build a shadow copy next to the live table.
+TABLES = {
+    "jobs": """
+        CREATE TABLE IF NOT EXISTS {name} (
             id TEXT PRIMARY KEY,
             command TEXT NOT NULL,
             state TEXT NOT NULL,
             attempts INTEGER NOT NULL DEFAULT 0,
             max_retries INTEGER NOT NULL DEFAULT 3,
             priority INTEGER NOT NULL DEFAULT 5,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            next_run_at TEXT,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL,
+            next_run_at INTEGER,
             last_error TEXT,
+            error_fp TEXT,
             worker_id TEXT,
-            lease_expires_at TEXT
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_jobs_state_next ON jobs(state, next_run_at);
-        CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(lease_expires_at);
-
-        CREATE TABLE IF NOT EXISTS workers (
+            lease_expires_at INTEGER,
+            remaining_deps INTEGER NOT NULL DEFAULT 0,
+            schedule_id TEXT,
+            retry_policy TEXT,
+            retry_delay_ms INTEGER
+        )
+    """,
+    # dependency edges: child waits until remaining_deps drops to 0
+    "job_deps": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            parent_id TEXT NOT NULL,
+            child_id TEXT NOT NULL,
+            satisfied INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (parent_id, child_id)
+        ) WITHOUT ROWID
+    """,
+    # enqueue-time deduplication: key -> job that owns it until expires_at
+    "dedupe_keys": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            key TEXT PRIMARY KEY,
+            job_id TEXT NOT NULL,
+            expires_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """,
+    # recurring job templates fired by the supervisor's scheduler loop
+    "schedules": """
+        CREATE TABLE IF NOT EXISTS {name} (
             id TEXT PRIMARY KEY,
-            started_at TEXT NOT NULL,
-            last_heartbeat_at TEXT NOT NULL,
+            command TEXT NOT NULL,
+            cron TEXT,
+            interval_seconds INTEGER,
+            priority INTEGER NOT NULL DEFAULT 5,
+            max_retries INTEGER,
+            misfire_policy TEXT NOT NULL DEFAULT 'run_once',
+            overlap_policy TEXT NOT NULL DEFAULT 'allow',
+            enabled INTEGER NOT NULL DEFAULT 1,
+            next_fire_at INTEGER NOT NULL,
+            last_fired_at INTEGER,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+    """,
+    # per-error-class failure counts for the retry circuit breaker
+    "retry_breakers": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            error_fp TEXT PRIMARY KEY,
+            window_start INTEGER NOT NULL,
+            failures INTEGER NOT NULL DEFAULT 0,
+            open_until INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """,
+    "workers": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id TEXT PRIMARY KEY,
+            started_at INTEGER NOT NULL,
+            last_heartbeat_at INTEGER NOT NULL,
             hostname TEXT,
             pid INTEGER
-        );
-
-        CREATE TABLE IF NOT EXISTS config (
+        )
+    """,
+    "config": """
+        CREATE TABLE IF NOT EXISTS {name} (
             key TEXT PRIMARY KEY,
             value TEXT NOT NULL
-        );
-        """
-    )
+        )
+    """,
+}
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_jobs_state_next ON jobs(state, next_run_at)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(lease_expires_at)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_schedule ON jobs(schedule_id, state)",
+    # covers `dlq summary` (GROUP BY error_fp over dead jobs) without touching the table
+    "CREATE INDEX IF NOT EXISTS idx_jobs_state_fp ON jobs(state, error_fp, updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_job_deps_child ON job_deps(child_id)",
+    "CREATE INDEX IF NOT EXISTS idx_dedupe_expires ON dedupe_keys(expires_at)",
+)
+
+# epoch-ms columns (stored as text before schema version 1)
+TIME_COLUMNS = {
+    "jobs": ("created_at", "updated_at", "next_run_at", "lease_expires_at"),
+    "dedupe_keys": ("expires_at",),
+    "schedules": ("next_fire_at", "last_fired_at", "created_at", "updated_at"),
+    "workers": ("started_at", "last_heartbeat_at"),
+}
+
+_initialized_path: Optional[Path] = None
+
+
+def init_db() -> None:
+    """Create tables if they don't exist, migrate older schemas and seed default config.
+
+    Runs once per process (per DB path); later calls are free.
+    """
+    global _initialized_path
+    if _initialized_path == db_path():
+        return
+
+    with closing(get_connection()) as conn:
+        _init_schema(conn)
+    _initialized_path = db_path()
+
+
+def _init_schema(conn: sqlite3.Connection) -> None:
+    from .migrations import migrate
+
+    cur = conn.cursor()
+
+    fresh = cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='jobs'").fetchone() is None
+
+    for name, ddl in TABLES.items():
+        cur.execute(ddl.format(name=name))
+    if fresh:
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+    migrate(conn)
+
+    for stmt in INDEXES:
+        cur.execute(stmt)
 
     # seed defaults
     for k, v in DEFAULTS.items():
@@ -83,23 +194,23 @@ def init_db() -> None:
 
 
 def get_config(key: str, default: Optional[str] = None) -> Optional[str]:
-    conn = get_connection()
-    row = conn.execute("SELECT value FROM config WHERE key=?", (key,)).fetchone()
+    with closing(get_connection()) as conn:
+        row = conn.execute("SELECT value FROM config WHERE key=?", (key,)).fetchone()
     if row:
         return row[0]
     return default
 
 
 def set_config(key: str, value: str) -> None:
-    conn = get_connection()
-    conn.execute(
-        "INSERT INTO config(key, value) VALUES(?, ?)\n         ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-        (key, value),
-    )
-    conn.commit()
+    with closing(get_connection()) as conn:
+        conn.execute(
+            "INSERT INTO config(key, value) VALUES(?, ?)\n         ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+            (key, value),
+        )
+        conn.commit()
 
 
 def all_config() -> dict:
-    conn = get_connection()
-    rows = conn.execute("SELECT key, value FROM config ORDER BY key").fetchall()
+    with closing(get_connection()) as conn:
+        rows = conn.execute("SELECT key, value FROM config ORDER BY key").fetchall()
     return {r[0]: r[1] for r in rows}
\ No newline at end of file
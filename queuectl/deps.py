@@ -0,0 +1,167 @@
+from __future__ import annotations
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .constants import JobState, DEPENDENCY_FAILURE_POLICIES
+from .util.fingerprint import error_fingerprint
+
+
+# -----------------------
+# Dependency bookkeeping
+# -----------------------
+# Every edge in job_deps is either satisfied (parent completed, or parent died
+# under the "ignore" policy) or not. A child's remaining_deps is the number of
+# its unsatisfied edges; it sits in the `waiting` state until that hits 0.
+# All updates below walk job_deps by parent_id (the primary key prefix), so
+# finishing a parent only touches its own children — never the whole waiting set.
+
+
+def failure_policy(value: Optional[str]) -> str:
+    """Normalize the configured dependency_failure_policy (default: cascade)."""
+    value = (value or "").strip().lower()
+    return value if value in DEPENDENCY_FAILURE_POLICIES else "cascade"
+
+
+def plan_dependencies(
+    conn: sqlite3.Connection, parent_ids: Iterable[str], policy: str
+) -> Tuple[str, List[Tuple[str, int]], Optional[str]]:
+    """Work out how a new child job starts, given its parents.
+
+    Returns (initial_state, [(parent_id, satisfied)], last_error).
+    Raises ValueError if a parent does not exist.
+    """
+    parents = list(dict.fromkeys(parent_ids))
+    if not parents:
+        return JobState.PENDING, [], None
+
+    marks = ",".join("?" * len(parents))
+    states: Dict[str, str] = {
+        r["id"]: r["state"]
+        for r in conn.execute(f"SELECT id, state FROM jobs WHERE id IN ({marks})", parents)
+    }
+    missing = [p for p in parents if p not in states]
+    if missing:
+        raise ValueError(f"unknown parent job(s): {', '.join(missing)}")
+
+    edges: List[Tuple[str, int]] = []
+    dead_parent: Optional[str] = None
+    for p in parents:
+        state = states[p]
+        if state == JobState.DEAD and dead_parent is None:
+            dead_parent = p
+        done = state == JobState.COMPLETED or (state == JobState.DEAD and policy == "ignore")
+        edges.append((p, 1 if done else 0))
+
+    if dead_parent is not None and policy == "cascade":
+        return JobState.DEAD, edges, f"dependency {dead_parent} is dead"
+
+    remaining = sum(1 for _, satisfied in edges if not satisfied)
+    return (JobState.WAITING if remaining else JobState.PENDING), edges, None
+
+
+def add_edges(conn: sqlite3.Connection, child_id: str, edges: List[Tuple[str, int]]) -> None:
+    conn.executemany(
+        "INSERT OR IGNORE INTO job_deps(parent_id, child_id, satisfied) VALUES(?, ?, ?)",
+        [(parent_id, child_id, satisfied) for parent_id, satisfied in edges],
+    )
+
+
+def release_children(conn: sqlite3.Connection, parent_id: str, now: int) -> int:
+    """Mark parent_id's edges satisfied and release children that hit zero.
+
+    Must run inside the caller's transaction. Returns the number of children
+    moved from waiting to pending.
+    """
+    conn.execute(
+        """
+        UPDATE jobs SET remaining_deps = remaining_deps - 1
+        WHERE id IN (SELECT child_id FROM job_deps WHERE parent_id = ? AND satisfied = 0)
+        """,
+        (parent_id,),
+    )
+    released = conn.execute(
+        """
+        UPDATE jobs SET state = ?, next_run_at = ?, updated_at = ?
+        WHERE id IN (SELECT child_id FROM job_deps WHERE parent_id = ? AND satisfied = 0)
+          AND state = ? AND remaining_deps <= 0
+        """,
+        (JobState.PENDING, now, now, parent_id, JobState.WAITING),
+    ).rowcount
+    conn.execute(
+        "UPDATE job_deps SET satisfied = 1 WHERE parent_id = ? AND satisfied = 0",
+        (parent_id,),
+    )
+    return released
+
+
+def cascade_dead(conn: sqlite3.Connection, parent_id: str, now: int) -> int:
+    """Move every waiting descendant of a dead job to the DLQ.
+
+    Must run inside the caller's transaction. Returns the number of jobs killed.
+    """
+    killed = 0
+    stack = [parent_id]
+    while stack:
+        pid = stack.pop()
+        children = [
+            r[0]
+            for r in conn.execute(
+                """
+                SELECT d.child_id FROM job_deps d JOIN jobs j ON j.id = d.child_id
+                WHERE d.parent_id = ? AND d.satisfied = 0 AND j.state = ?
+                """,
+                (pid, JobState.WAITING),
+            )
+        ]
+        msg = f"dependency {pid} is dead"
+        for child_id in children:
+            conn.execute(
+                "UPDATE jobs SET state=?, last_error=?, error_fp=?, next_run_at=NULL, updated_at=? "
+                "WHERE id=? AND state=?",
+                (JobState.DEAD, msg, error_fingerprint(msg), now, child_id, JobState.WAITING),
+            )
+        killed += len(children)
+        stack.extend(children)
+    return killed
+
+
+def on_parent_dead(conn: sqlite3.Connection, parent_id: str, now: int, policy: str) -> int:
+    """Apply the dependency failure policy after parent_id landed in the DLQ."""
+    if policy == "cascade":
+        return cascade_dead(conn, parent_id, now)
+    if policy == "ignore":
+        return release_children(conn, parent_id, now)
+    return 0  # block: children keep waiting until the parent is retried and completes
+
+
+def on_parent_purged(conn: sqlite3.Connection, parent_id: str, now: int, policy: str) -> int:
+    """Settle a dead parent's unfinished children before it is purged.
+
+    A purged parent can never complete, so under "block" its waiting children
+    would wait forever: they go to the DLQ as under "cascade". Under "ignore"
+    they are released. Either way the parent's edges are then satisfied, so
+    remaining_deps stays right once they are dropped. Must run inside the
+    caller's transaction. Returns the number of children killed or released.
+    """
+    killed = cascade_dead(conn, parent_id, now) if policy != "ignore" else 0
+    return killed + release_children(conn, parent_id, now)
+
+
+def parents_of(conn: sqlite3.Connection, job_id: str) -> List[sqlite3.Row]:
+    return conn.execute(
+        """
+        SELECT j.id, j.state, d.satisfied FROM job_deps d JOIN jobs j ON j.id = d.parent_id
+        WHERE d.child_id = ? ORDER BY j.id
+        """,
+        (job_id,),
+    ).fetchall()
+
+
+def children_of(conn: sqlite3.Connection, job_id: str) -> List[sqlite3.Row]:
+    return conn.execute(
+        """
+        SELECT j.id, j.state, j.remaining_deps FROM job_deps d JOIN jobs j ON j.id = d.child_id
+        WHERE d.parent_id = ? ORDER BY j.id
+        """,
+        (job_id,),
+    ).fetchall()
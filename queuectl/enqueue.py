@@ -1,21 +1,47 @@
 import json
 from rich.console import Console
-from datetime import datetime, timedelta, timezone
 
 from .db import get_connection
 from .models import Job
 from .config import get_value
+from .constants import JobState, RETRY_POLICIES
+from .deps import plan_dependencies, add_edges, failure_policy
+from .retry import retry_policy as _retry_policy
+from .util.time import now_ms, ms_after, parse_ts, fmt_ts
+from .util.fingerprint import error_fingerprint
 
 console = Console()
 
 
-def _ts_now():
-    """Return UTC timestamp formatted for SQLite."""
-    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+# states in which a coalescing submission can still be folded into the existing job;
+# a failed job has already run, so a new submission takes the key over for a fresh run
+_COALESCABLE = (JobState.WAITING, JobState.PENDING)
 
 
-def _ts_after_delay(seconds: int):
-    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S")
+def _claim_dedupe_key(conn, key: str, job_id: str, now: int, expires_at: int, coalesce: bool) -> str:
+    """Try to take ownership of a dedupe key; return the id of the job that owns it.
+
+    A single upsert does the work: the key is only taken over when the current
+    owner's window expired or its job is gone. In coalesce mode the key is also
+    released once the owning job has started, so later submissions get a fresh run.
+    """
+    marks = ",".join("?" * len(_COALESCABLE))
+    takeover = "dedupe_keys.expires_at <= ? OR NOT EXISTS (SELECT 1 FROM jobs WHERE id = dedupe_keys.job_id"
+    takeover += f" AND state IN ({marks}))" if coalesce else ")"
+    # opportunistically drop a few expired keys so the table stays small
+    conn.execute(
+        "DELETE FROM dedupe_keys WHERE key IN (SELECT key FROM dedupe_keys WHERE expires_at <= ? LIMIT 100)",
+        (now,),
+    )
+    conn.execute(
+        f"""
+        INSERT INTO dedupe_keys(key, job_id, expires_at) VALUES(?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET job_id = excluded.job_id, expires_at = excluded.expires_at
+        WHERE {takeover}
+        """,
+        (key, job_id, expires_at, now, *(_COALESCABLE if coalesce else ())),
+    )
+    return conn.execute("SELECT job_id FROM dedupe_keys WHERE key=?", (key,)).fetchone()[0]
 
 
 def enqueue_job(
@@ -24,6 +50,10 @@ def enqueue_job(
     priority: int = 5,
     run_at: str | None = None,
     delay: int | None = None,
+    depends_on: list[str] | None = None,
+    dedupe_key: str | None = None,
+    coalesce: bool = False,
+    retry_policy: str | None = None,
 ):
     """
     Enqueue a job into SQLite storage.
@@ -32,6 +62,19 @@ def enqueue_job(
     1. CLI flag (--max-retries)
     2. JSON payload value
     3. Global config default
+
+    Parents come from --depends-on plus the payload's "depends_on" (a list of ids,
+    or a single id); the job stays `waiting` until all of them complete.
+
+    With a dedupe_key, a repeat submission inside the dedupe_ttl_seconds window
+    is absorbed and the existing job's id is returned instead of inserting.
+    With coalesce, repeats merge into the existing job only while it has not
+    started yet (priority/run time take the more urgent of the two).
+
+    retry_policy (CLI, then payload) overrides the global retry_policy config
+    for this job only.
+
+    Returns the id of the job that will run, or None on error.
     """
 
     try:
@@ -55,49 +98,116 @@ def enqueue_job(
 
     # Determine scheduling
     if delay:
-        next_run_at = _ts_after_delay(delay)
+        next_run_at = ms_after(delay)
     elif run_at:
-        next_run_at = run_at  # used as provided
+        try:
+            next_run_at = parse_ts(run_at)  # naive = UTC
+        except ValueError:
+            console.print(f"[red]Invalid --run-at timestamp[/]: {run_at} (expected YYYY-MM-DD HH:MM:SS)")
+            return
     else:
-        next_run_at = _ts_now()
+        next_run_at = now_ms()
 
     # Determine priority
     priority = int(priority or data.get("priority", 5))
 
+    # Determine dependencies (a single parent may be given as a plain id)
+    payload_parents = data.get("depends_on") or []
+    if isinstance(payload_parents, str):
+        payload_parents = [payload_parents]
+    if not isinstance(payload_parents, list) or not all(isinstance(p, str) for p in payload_parents):
+        console.print("[red]'depends_on' must be a job id or a list of job ids[/]")
+        return
+    parents = list(depends_on or []) + payload_parents
+
+    # Determine deduplication
+    dedupe_key = dedupe_key or data.get("dedupe_key")
+    coalesce = bool(coalesce or data.get("coalesce"))
+    if dedupe_key:
+        ttl = int(get_value("dedupe_ttl_seconds", "3600"))
+
+    # Determine retry policy (None = use the global config when it fails)
+    policy_name = retry_policy or data.get("retry_policy")
+    if policy_name and not _retry_policy(policy_name):
+        console.print(f"[red]Unknown retry policy[/]: {policy_name} (use one of {', '.join(RETRY_POLICIES)})")
+        return
+
     job = Job(
         id=data["id"],
         command=data["command"],
         max_retries=retries,
         priority=priority,
         next_run_at=next_run_at,
+        retry_policy=_retry_policy(policy_name),
     )
 
     conn = get_connection()
     try:
+        state, edges, last_error = JobState.PENDING, [], None
+        if parents:
+            policy = failure_policy(get_value("dependency_failure_policy"))
+        if parents or dedupe_key:
+            # lock first so a parent can't finish (or a duplicate slip in)
+            # between the checks and the insert
+            conn.execute("BEGIN IMMEDIATE")
+
+        if dedupe_key:
+            owner = _claim_dedupe_key(conn, dedupe_key, job.id, now_ms(), ms_after(ttl), coalesce)
+            if owner == job.id and conn.execute("SELECT 1 FROM jobs WHERE id=?", (job.id,)).fetchone():
+                # the same submission again (a producer retrying): leave the key as it was
+                conn.rollback()
+                console.print(f"[yellow]Job not enqueued:[/] {job.id} → already enqueued (dedupe_key={dedupe_key})")
+                return job.id
+            if owner != job.id:
+                merged = 0
+                if coalesce:
+                    merged = conn.execute(
+                        f"""
+                        UPDATE jobs SET priority = MIN(priority, ?), next_run_at = MIN(next_run_at, ?), updated_at = ?
+                        WHERE id = ? AND state IN ({",".join("?" * len(_COALESCABLE))})
+                        """,
+                        (priority, next_run_at, now_ms(), owner, *_COALESCABLE),
+                    ).rowcount
+                conn.commit()
+                what = f"coalesced into {owner}" if merged else f"duplicate of {owner}"
+                console.print(f"[yellow]Job not enqueued:[/] {job.id} → {what} (dedupe_key={dedupe_key})")
+                return owner
+
+        if parents:
+            state, edges, last_error = plan_dependencies(conn, parents, policy)
+
         conn.execute(
             """
             INSERT INTO jobs(id, command, state, attempts, max_retries, priority,
-                             created_at, updated_at, next_run_at)
-            VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)
+                             created_at, updated_at, next_run_at, last_error, error_fp, remaining_deps,
+                             retry_policy)
+            VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 job.id,
                 job.command,
-                "pending",
+                state,
                 0,
                 job.max_retries,
                 job.priority,
-                _ts_now(),
-                _ts_now(),
-                job.next_run_at,
+                job.created_at,
+                job.updated_at,
+                job.next_run_at if state != JobState.DEAD else None,
+                last_error,
+                error_fingerprint(last_error),
+                sum(1 for _, satisfied in edges if not satisfied),
+                job.retry_policy,
             ),
         )
+        add_edges(conn, job.id, edges)
         conn.commit()
 
         console.print(
             f"[green]Job enqueued:[/] {job.id}  "
-            f"(priority={priority}, next_run_at={next_run_at}, retries={retries})"
+            f"(priority={priority}, next_run_at={fmt_ts(next_run_at)}, retries={retries}, state={state.value})"
         )
+        return job.id
 
     except Exception as e:
+        conn.rollback()
         console.print(f"[red]Failed to enqueue job:[/] {e}")
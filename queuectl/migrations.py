@@ -0,0 +1,181 @@
+from __future__ import annotations
+import sqlite3
+from typing import Callable, List, Tuple
+
+from .db import TABLES, TIME_COLUMNS, _ensure_column
+from .util.fingerprint import error_fingerprint
+
+# -----------------------
+# Versioned schema migrations (tracked in PRAGMA user_version)
+# -----------------------
+# Migrations run online: workers on the old code may keep writing while a
+# table is rebuilt. Each rebuild works like this:
+#   1. create a shadow table with the new schema, plus triggers on the live
+#      table that mirror every insert/update/delete into it (converted);
+#   2. backfill existing rows in primary-key chunks, one short transaction
+#      per chunk, with INSERT OR IGNORE so trigger-written rows win;
+#   3. in one final transaction, drop the live tables, rename the shadows
+#      into place and bump user_version.
+# Every step is idempotent, so a crashed or concurrent migration just resumes.
+
+CHUNK_ROWS = 2000
+
+# epoch ms "now" in pure SQL (usable inside triggers, where Python isn't)
+_NOW_MS_SQL = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+
+def _ms_expr(col: str, not_null: bool) -> str:
+    """SQL converting a legacy text timestamp (either format we ever wrote) to epoch ms.
+    Values that are already integers pass through, so re-running is safe."""
+    expr = (
+        f"(CASE WHEN {col} IS NULL OR typeof({col}) = 'integer' THEN {col} "
+        f"ELSE CAST(strftime('%s', {col}) AS INTEGER) * 1000 END)"
+    )
+    return f"COALESCE({expr}, {_NOW_MS_SQL})" if not_null else expr
+
+
+def _user_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _needs_epoch_ms(conn: sqlite3.Connection, table: str) -> bool:
+    types = {r[1]: (r[2] or "").upper() for r in conn.execute(f"PRAGMA table_info({table})")}
+    return any(types.get(c, "INTEGER") != "INTEGER" for c in TIME_COLUMNS[table])
+
+
+def _rebuild_with_epoch_ms(conn: sqlite3.Connection, table: str, chunk_rows: int) -> str:
+    """Steps 1 and 2 for one table; returns the shadow table name."""
+    shadow = f"{table}_v1"
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute(TABLES[table].format(name=shadow))
+
+    info = conn.execute(f"PRAGMA table_info({shadow})").fetchall()
+    live_cols = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+    cols = [r[1] for r in info if r[1] in live_cols]
+    not_null = {r[1] for r in info if r[3]}
+    pk = next(r[1] for r in info if r[5] == 1)
+    time_cols = set(TIME_COLUMNS[table])
+
+    def exprs(prefix: str) -> str:
+        return ", ".join(
+            _ms_expr(prefix + c, c in not_null) if c in time_cols else prefix + c for c in cols
+        )
+
+    col_list = ", ".join(cols)
+    triggers = (
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_mig_ins AFTER INSERT ON {table} BEGIN
+            INSERT OR REPLACE INTO {shadow}({col_list}) VALUES({exprs("NEW.")});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_mig_upd AFTER UPDATE ON {table} BEGIN
+            DELETE FROM {shadow} WHERE {pk} = OLD.{pk};
+            INSERT OR REPLACE INTO {shadow}({col_list}) VALUES({exprs("NEW.")});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_mig_del AFTER DELETE ON {table} BEGIN
+            DELETE FROM {shadow} WHERE {pk} = OLD.{pk};
+        END""",
+    )
+    for ddl in triggers:
+        conn.execute(ddl)
+    conn.commit()
+
+    # backfill existing rows, keyset-paginated on the primary key
+    last = None
+    while True:
+        where, params = (f"WHERE {pk} > ?", (last,)) if last is not None else ("", ())
+        keys = [r[0] for r in conn.execute(
+            f"SELECT {pk} FROM {table} {where} ORDER BY {pk} LIMIT ?", (*params, chunk_rows)
+        )]
+        if not keys:
+            break
+        conn.execute(
+            f"INSERT OR IGNORE INTO {shadow}({col_list}) "
+            f"SELECT {exprs('')} FROM {table} WHERE {pk} >= ? AND {pk} <= ?",
+            (keys[0], keys[-1]),
+        )
+        conn.commit()
+        last = keys[-1]
+    return shadow
+
+
+def _to_epoch_ms(conn: sqlite3.Connection, chunk_rows: int = CHUNK_ROWS) -> None:
+    """v1: text timestamps -> integer epoch milliseconds.
+
+    The rebuilt tables use the full v1 DDL, so columns older databases lack
+    (jobs.remaining_deps, jobs.schedule_id) arrive with their defaults.
+    """
+    tables = [t for t in TIME_COLUMNS if _needs_epoch_ms(conn, t)]
+    shadows = {t: _rebuild_with_epoch_ms(conn, t, chunk_rows) for t in tables}
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if _user_version(conn) >= 1:  # someone else finished first
+            conn.rollback()
+            return
+        for table, shadow in shadows.items():
+            conn.execute(f"DROP TABLE {table}")  # drops its triggers and indexes too
+            conn.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _add_error_fingerprints(conn: sqlite3.Connection, chunk_rows: int = CHUNK_ROWS) -> None:
+    """v2: jobs.error_fp, backfilled from last_error in rowid chunks.
+
+    Rows written by older workers while this runs keep a NULL error_fp;
+    `dlq summary` fills those in lazily for the dead jobs it reads.
+    """
+    _ensure_column(conn.cursor(), "jobs", "error_fp", "TEXT")
+    conn.commit()
+    conn.create_function("error_fingerprint", 1, error_fingerprint, deterministic=True)
+
+    last = 0
+    while True:
+        rowids = [r[0] for r in conn.execute(
+            "SELECT rowid FROM jobs WHERE rowid > ? AND last_error IS NOT NULL AND error_fp IS NULL "
+            "ORDER BY rowid LIMIT ?",
+            (last, chunk_rows),
+        )]
+        if not rowids:
+            break
+        conn.execute(
+            "UPDATE jobs SET error_fp = error_fingerprint(last_error) "
+            "WHERE rowid BETWEEN ? AND ? AND last_error IS NOT NULL AND error_fp IS NULL",
+            (rowids[0], rowids[-1]),
+        )
+        conn.commit()
+        last = rowids[-1]
+
+    conn.execute("PRAGMA user_version = 2")
+    conn.commit()
+
+
+def _add_retry_policy(conn: sqlite3.Connection) -> None:
+    """v3: per-job retry policy and the last retry delay (for decorrelated jitter)."""
+    cur = conn.cursor()
+    _ensure_column(cur, "jobs", "retry_policy", "TEXT")
+    _ensure_column(cur, "jobs", "retry_delay_ms", "INTEGER")
+    conn.execute("PRAGMA user_version = 3")
+    conn.commit()
+
+
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _to_epoch_ms),
+    (2, _add_error_fingerprints),
+    (3, _add_retry_policy),
+]
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """Bring the schema up to the latest version. Caller recreates indexes afterwards."""
+    for version, step in MIGRATIONS:
+        if _user_version(conn) >= version:
+            continue
+        try:
+            step(conn)
+        except sqlite3.OperationalError:
+            # a concurrent migrator swapped the tables out from under us
+            if _user_version(conn) < version:
+                raise
@@ -1,7 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 from .constants import JobState
-from .util.time import utcnow_iso
+from .util.time import now_ms
 from .config import get_value
 
 @dataclass
@@ -12,9 +12,11 @@ class Job:
     attempts: int = 0
     max_retries: int = int(get_value("max_retries", "3"))
     priority: int = 5  
-    created_at: str = utcnow_iso()
-    updated_at: str = utcnow_iso()
-    next_run_at: str = utcnow_iso()
+    created_at: int = field(default_factory=now_ms)  # epoch ms (UTC)
+    updated_at: int = field(default_factory=now_ms)
+    next_run_at: int = field(default_factory=now_ms)
     last_error: Optional[str] = None
     worker_id: Optional[str] = None
-    lease_expires_at: Optional[str] = None
\ No newline at end of file
+    lease_expires_at: Optional[int] = None
+    remaining_deps: int = 0
+    retry_policy: Optional[str] = None  # None = global retry_policy config
@@ -0,0 +1,97 @@
+from __future__ import annotations
+import random
+import sqlite3
+from typing import NamedTuple, Optional
+
+from .constants import RETRY_POLICIES
+
+
+# -----------------------
+# Retry policies
+# -----------------------
+# All policies use backoff_base as their unit and max_backoff_seconds as the cap:
+#   exponential          base ** attempts                       (2, 4, 8, 16 ...)
+#   full_jitter          uniform(0, base ** attempts)
+#   decorrelated_jitter  uniform(base, 3 * previous delay)
+#   linear               base * attempts                        (2, 4, 6, 8 ...)
+#   fixed                base                                   (2, 2, 2, 2 ...)
+# The jittered policies keep jobs that failed together from coming due together.
+
+
+def retry_policy(value: Optional[str]) -> Optional[str]:
+    """Normalize a retry policy name; None if it isn't one."""
+    value = (value or "").strip().lower().replace("-", "_")
+    return value if value in RETRY_POLICIES else None
+
+
+def backoff_seconds(
+    policy: str, attempts: int, base: float, cap: float,
+    previous: Optional[float] = None, rng: random.Random = random,
+) -> float:
+    """Delay before retry number `attempts` (1-based) under `policy`."""
+    if policy == "fixed":
+        delay = base
+    elif policy == "linear":
+        delay = base * attempts
+    elif policy == "decorrelated_jitter":
+        prev = previous if previous else base
+        delay = rng.uniform(base, max(base, prev * 3))
+    else:
+        # guard the exponent so a large attempt count can't overflow before the cap applies
+        delay = cap if attempts >= 64 else min(base ** attempts, cap)
+        if policy == "full_jitter":
+            delay = rng.uniform(0, delay)
+    return max(0.0, min(delay, cap))
+
+
+# -----------------------
+# Per-error-class circuit breaker
+# -----------------------
+# Failures are counted per error fingerprint (jobs.error_fp) in a fixed window.
+# Once a class reaches `threshold` failures in one window the breaker opens for
+# `cooldown` ms: retries of that class are held until it closes and then spread
+# uniformly over the following cooldown period, instead of all retrying into
+# the same outage and coming due in the same second.
+
+
+class Breaker(NamedTuple):
+    threshold: int
+    window_ms: int
+    cooldown_ms: int
+
+
+def apply_breaker(
+    conn: sqlite3.Connection, breaker: Breaker, error_fp: Optional[str],
+    now: int, due: Optional[int], rng: random.Random = random,
+) -> Optional[int]:
+    """Count one failure of error_fp and return when its retry may run.
+
+    `due` is the policy's retry time (None for jobs going to the DLQ, which are
+    counted but not rescheduled). Must run inside the caller's transaction.
+    """
+    if error_fp is None:
+        return due
+    conn.execute(
+        """
+        INSERT INTO retry_breakers(error_fp, window_start, failures, open_until) VALUES(?, ?, 1, 0)
+        ON CONFLICT(error_fp) DO UPDATE SET
+            failures = CASE WHEN window_start <= excluded.window_start - ? THEN 1 ELSE failures + 1 END,
+            window_start = CASE WHEN window_start <= excluded.window_start - ? THEN excluded.window_start
+                                ELSE window_start END
+        """,
+        (error_fp, now, breaker.window_ms, breaker.window_ms),
+    )
+    # trip: open for a cooldown and start counting afresh
+    conn.execute(
+        """
+        UPDATE retry_breakers SET open_until = ?, failures = 0, window_start = ?
+        WHERE error_fp = ? AND failures >= ? AND open_until <= ?
+        """,
+        (now + breaker.cooldown_ms, now, error_fp, breaker.threshold, now),
+    )
+    open_until = conn.execute(
+        "SELECT open_until FROM retry_breakers WHERE error_fp = ?", (error_fp,)
+    ).fetchone()[0]
+    if due is None or open_until <= now:
+        return due
+    return max(due, open_until + int(rng.uniform(0, breaker.cooldown_ms)))
@@ -0,0 +1,100 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import FrozenSet
+
+# Standard 5-field cron: minute hour day-of-month month day-of-week (UTC).
+# Supports *, a-b, lists, /step and the usual @aliases.
+
+ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# (low, high) per field
+_BOUNDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+# give up if nothing matches within this many years (e.g. "0 0 30 2 *")
+_MAX_YEARS = 5
+
+
+def _parse_field(text: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_s = part.split("/", 1)
+            step = int(step_s)
+            if step <= 0:
+                raise ValueError(f"invalid step in cron field: {text!r}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = int(a), int(b)
+        else:
+            start = int(part)
+            end = high if step != 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"cron field {text!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class CronExpr:
+    minutes: FrozenSet[int]
+    hours: FrozenSet[int]
+    days: FrozenSet[int]
+    months: FrozenSet[int]
+    weekdays: FrozenSet[int]  # 0 = Sunday
+    dom_any: bool
+    dow_any: bool
+
+    @classmethod
+    def parse(cls, expr: str) -> "CronExpr":
+        expr = ALIASES.get(expr.strip().lower(), expr.strip())
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields, got {len(fields)}: {expr!r}")
+        try:
+            parsed = [_parse_field(f, lo, hi) for f, (lo, hi) in zip(fields, _BOUNDS)]
+        except ValueError as e:
+            raise ValueError(f"invalid cron expression {expr!r}: {e}") from None
+        weekdays = frozenset(d % 7 for d in parsed[4])
+        return cls(parsed[0], parsed[1], parsed[2], parsed[3], weekdays,
+                   dom_any=fields[2] == "*", dow_any=fields[4] == "*")
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        # classic cron: when both are restricted, either one may match
+        if not self.dom_any and not self.dow_any:
+            return dom or dow
+        return dom and dow
+
+    def next_after(self, dt: datetime) -> datetime:
+        """First matching minute strictly after dt (naive UTC in, naive UTC out)."""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt.year + _MAX_YEARS
+        while t.year <= limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            later = [m for m in self.minutes if m >= t.minute]
+            if not later:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            return t.replace(minute=min(later))
+        raise ValueError("cron expression never matches")
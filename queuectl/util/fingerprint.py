@@ -0,0 +1,38 @@
+from __future__ import annotations
+import re
+from typing import Optional
+
+# -----------------------
+# Error fingerprints: last_error with the run-specific parts masked out, so
+# dead jobs that failed the same way group together (`queuectl dlq summary`).
+# -----------------------
+
+FINGERPRINT_MAX = 200
+
+# applied in order; earlier rules mask things later ones would chew up
+_RULES = (
+    (re.compile(r"^dependency \S+ is dead$"), "dependency <id> is dead"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"(?:[A-Za-z]:)?(?:[\\/][\w.\-]+){2,}[\\/]?"), "<path>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b"), "<hex>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def error_fingerprint(error: Optional[str]) -> Optional[str]:
+    """Normalize an error message into its failure class.
+
+    Only the last non-empty line is kept (tracebacks end with the exception),
+    then quoted strings, paths, ids and numbers are replaced by placeholders.
+    """
+    if not error:
+        return None
+    lines = [ln for ln in error.strip().splitlines() if ln.strip()]
+    if not lines:
+        return None
+    fp = lines[-1].strip()
+    for pattern, repl in _RULES:
+        fp = pattern.sub(repl, fp)
+    return fp.strip()[:FINGERPRINT_MAX]
@@ -1,5 +1,59 @@
-from datetime import datetime, timezone
+from __future__ import annotations
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
+# All timestamps are stored as integer milliseconds since the Unix epoch (UTC).
+# Conversion to/from text happens only at the edges: CLI input and display.
 
-def utcnow_iso() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
\ No newline at end of file
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def ms_after(seconds: float, base: Optional[int] = None) -> int:
+    return (now_ms() if base is None else base) + int(seconds * 1000)
+
+
+def to_ms(dt: datetime) -> int:
+    """datetime -> epoch ms; naive datetimes are taken as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def from_ms(ms: int) -> datetime:
+    """epoch ms -> aware UTC datetime."""
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def parse_ts(text: str) -> int:
+    """Parse a user-supplied timestamp ('YYYY-MM-DD HH:MM:SS', ISO 8601, trailing Z).
+    Naive values are UTC. Raises ValueError on anything else."""
+    text = text.strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    return to_ms(datetime.fromisoformat(text))
+
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$")
+_UNIT_SECONDS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(text: str) -> float:
+    """Parse '90', '90s', '15m', '2h', '7d' or '1w' into seconds. Raises ValueError."""
+    m = _DURATION.match(text.lower())
+    if not m:
+        raise ValueError(f"invalid duration: {text!r} (use e.g. 30s, 15m, 2h, 7d)")
+    return float(m.group(1)) * _UNIT_SECONDS[m.group(2)]
+
+
+def fmt_ts(ms: Optional[int], tz: timezone = timezone.utc) -> str:
+    """Display form of a stored timestamp."""
+    if ms is None:
+        return "—"
+    suffix = " IST" if tz is IST else ""
+    return from_ms(ms).astimezone(tz).strftime("%Y-%m-%d %H:%M:%S") + suffix
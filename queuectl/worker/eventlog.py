@@ -0,0 +1,293 @@
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from rich.console import Console
+from rich.markup import escape
+
+from ..config import get_value
+from ..constants import EVENTS_FILENAME, LOGS_DIRNAME
+from ..db import app_dir
+from ..util.time import IST, fmt_ts, from_ms, now_ms
+
+# -----------------------
+# Structured worker event log
+# -----------------------
+# Workers don't format or print anything on the hot path: emit() filters the
+# event, builds a small dict and appends it to an in-memory deque. A background
+# thread ships whatever has piled up every `log_flush_ms` to the sinks:
+#   - under `worker start`, a multiprocessing queue read by the supervisor,
+#     which is then the only process writing the file and the terminal;
+#   - standalone, the sinks themselves (rotating JSON-lines file + console).
+#
+# Filtering: events below `log_level` are dropped, and "success" events
+# (claimed/completed) are kept for a `log_sample_rate` fraction of jobs, chosen
+# by job id so a sampled job keeps its whole trace. Audit events (every job
+# outcome: completed, retry, dead, released children) always reach the file;
+# filtering only decides whether they are shown on the console.
+#
+# The console is by far the slowest sink (a few ms per line). When workers
+# outrun it and batches pile up in the supervisor's queue, the collector
+# sheds the console: only warnings and errors are rendered until it catches
+# up. The file still gets every event.
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+# queued batches (one per worker per log_flush_ms) beyond which the collector sheds the console
+CONSOLE_BACKLOG_BATCHES = 20
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+_LEVEL_NAMES = {v: k for k, v in LEVELS.items()}
+
+# (show on console, record)
+Event = Tuple[bool, dict]
+Sink = Callable[[List[Event]], None]
+
+
+def logs_dir() -> Path:
+    return app_dir() / LOGS_DIRNAME
+
+
+def _floatcfg(key: str, default: float) -> float:
+    try:
+        return float(get_value(key, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class EventLog:
+    def __init__(self, worker_id: str, sinks: List[Sink], level: str = "info",
+                 sample_rate: float = 1.0, flush_ms: int = 200):
+        self.worker_id = worker_id
+        self.sinks = sinks
+        self.level = LEVELS.get((level or "").strip().lower(), INFO)
+        self._sample_below = int(max(0.0, min(1.0, sample_rate)) * 10_000)
+        self._pending: deque = deque()
+        self._flush_s = max(flush_ms, 10) / 1000.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="queuectl-eventlog", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, worker_id: str, sinks: List[Sink]) -> "EventLog":
+        return cls(
+            worker_id, sinks,
+            level=get_value("log_level", "info"),
+            sample_rate=_floatcfg("log_sample_rate", 1.0),
+            flush_ms=int(_floatcfg("log_flush_ms", 200)),
+        )
+
+    def _sampled(self, job: str) -> bool:
+        return zlib.crc32(job.encode()) % 10_000 < self._sample_below
+
+    def emit(self, event: str, level: int = INFO, job: Optional[str] = None,
+             audit: bool = False, success: bool = False, **fields) -> None:
+        show = level >= self.level and not (success and job is not None and not self._sampled(job))
+        if not (show or audit):
+            return
+        record = {"ts": now_ms(), "level": _LEVEL_NAMES[level], "event": event, "worker": self.worker_id}
+        if job is not None:
+            record["job"] = job
+        record.update(fields)
+        self._pending.append((show, record))
+
+    def _drain(self) -> None:
+        batch: List[Event] = []
+        pop = self._pending.popleft
+        try:
+            while True:
+                batch.append(pop())
+        except IndexError:
+            pass
+        if not batch:
+            return
+        for sink in self.sinks:
+            try:
+                sink(batch)
+            except Exception as e:  # never take the worker down over logging
+                sys.stderr.write(f"queuectl: event log sink failed: {e}\n")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._flush_s):
+            self._drain()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._drain()
+
+
+# -----------------------
+# Sinks
+# -----------------------
+class RotatingFileSink:
+    """Appends JSON lines; at `max_bytes` rolls events.jsonl -> .1 -> ... -> .<backups>."""
+
+    def __init__(self, path: Path, max_bytes: int = 10 * 1024 * 1024, backups: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "a", encoding="utf-8")
+        self._size = self._fh.tell()
+
+    def _rotate(self) -> None:
+        self._fh.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._fh = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def __call__(self, batch: List[Event]) -> None:
+        data = "".join(
+            json.dumps({**rec, "ts": from_ms(rec["ts"]).isoformat(timespec="milliseconds")},
+                       separators=(",", ":"), default=str) + "\n"
+            for _, rec in batch
+        )
+        if self.max_bytes > 0 and self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._fh.write(data)
+        self._fh.flush()
+        self._size += len(data)
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def _describe(rec: dict) -> str:
+    """Human-readable line for one event (the old worker console messages)."""
+    ev, job = rec["event"], escape(str(rec.get("job", "")))
+    if ev == "job.claimed":
+        return f"Picked job: {job} | cmd: {escape(rec.get('command', ''))}"
+    if ev == "job.completed":
+        return f" completed: {job}"
+    if ev == "job.released":
+        of = f" of {job}" if job else ""
+        return f" released {rec.get('count')} dependent job(s){of}"
+    if ev == "job.retry":
+        what = "exception" if rec.get("exception") else f"failed attempt {rec.get('attempt')}"
+        due = rec.get("next_run_at")
+        return f" {what}; retry at {fmt_ts(due)} ({fmt_ts(due, IST)})"
+    if ev == "job.dead":
+        how = " (exception)" if rec.get("exception") else ""
+        return f" DLQ{how}: {job} (attempts {rec.get('attempt')})"
+    if ev == "worker.started":
+        return f"[bold cyan]started[/] ({escape(rec.get('detail', ''))})"
+    if ev == "worker.stopping":
+        return "stop flag detected → exiting when idle"
+    if ev == "worker.exiting":
+        return "exiting"
+    if ev == "worker.flush_failed":
+        return (f"group flush failed, {rec.get('buffered')} result(s) kept for the next one: "
+                f"{escape(str(rec.get('error')))}")
+    if ev == "worker.profile_written":
+        return f"profile written to {escape(str(rec.get('path')))}"
+    extra = " ".join(f"{k}={v}" for k, v in rec.items() if k not in ("ts", "level", "event", "worker", "job"))
+    return escape(f"{ev} {rec.get('job', '')} {extra}".strip())
+
+
+_LEVEL_STYLE = {"warning": "yellow", "error": "red"}
+
+
+class ConsoleSink:
+    """Optional human-readable rendering of the events that pass the filters."""
+
+    def __init__(self, console: Optional[Console] = None):
+        self.console = console or Console()
+        self.shedding = False  # set by the collector while it is behind
+        self._shed = 0
+
+    def _report_shed(self) -> None:
+        if self._shed:
+            self.console.print(f"[dim]… {self._shed} event(s) below warning not shown while the console was "
+                               f"behind (see {EVENTS_FILENAME})[/]", highlight=False)
+            self._shed = 0
+
+    def __call__(self, batch: List[Event]) -> None:
+        if not self.shedding:
+            self._report_shed()
+        for show, rec in batch:
+            if not show:
+                continue
+            if self.shedding and LEVELS[rec["level"]] < WARNING:
+                self._shed += 1
+                continue
+            when = from_ms(rec["ts"]).strftime("%H:%M:%S.%f")[:-3]
+            line = f"[dim]{when}[/] {escape('[' + rec['worker'] + ']')} {_describe(rec)}"
+            style = _LEVEL_STYLE.get(rec["level"])
+            self.console.print(f"[{style}]{line}[/]" if style else line, highlight=False)
+
+    def close(self) -> None:
+        self._report_shed()
+
+
+def open_sinks() -> List[Sink]:
+    """The configured sinks: the rotating event file, plus the console if log_console is on."""
+    sinks: List[Sink] = [RotatingFileSink(
+        logs_dir() / EVENTS_FILENAME,
+        max_bytes=int(_floatcfg("log_max_bytes", 10 * 1024 * 1024)),
+        backups=int(_floatcfg("log_backups", 5)),
+    )]
+    if (get_value("log_console", "1") or "1").strip().lower() not in ("0", "false", "no"):
+        sinks.append(ConsoleSink())
+    return sinks
+
+
+def close_sinks(sinks: List[Sink]) -> None:
+    for sink in sinks:
+        close = getattr(sink, "close", None)
+        if close is not None:
+            close()
+
+
+# -----------------------
+# Supervisor side
+# -----------------------
+def _backlog(queue) -> int:
+    try:
+        return queue.qsize()
+    except NotImplementedError:  # macOS has no sem_getvalue
+        return 0
+
+
+class EventCollector:
+    """Supervisor thread that drains workers' event batches into the sinks."""
+
+    def __init__(self, queue, sinks: List[Sink], max_backlog: int = CONSOLE_BACKLOG_BATCHES):
+        self.queue = queue
+        self.sinks = sinks
+        self.max_backlog = max_backlog
+        self._thread = threading.Thread(target=self._run, name="queuectl-events", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                break
+            behind = _backlog(self.queue) > self.max_backlog
+            for sink in self.sinks:
+                if hasattr(sink, "shedding"):
+                    sink.shedding = behind
+                try:
+                    sink(batch)
+                except Exception as e:
+                    sys.stderr.write(f"queuectl: event log sink failed: {e}\n")
+
+    def stop(self) -> None:
+        """Call once every worker has exited: write what's left and close the sinks."""
+        self.queue.put(None)
+        self._thread.join()
+        close_sinks(self.sinks)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import subprocess
 from dataclasses import dataclass
+from typing import Callable
 import os
 
 @dataclass
@@ -10,8 +11,11 @@ class ExecResult:
     stderr: str
 
 
-def run_command(cmd: str, timeout: int | None = None) -> ExecResult:
+def run_command(cmd: str, timeout: int | None = None,
+                on_slow: Callable[[], None] | None = None, slow_after: float = 0.0) -> ExecResult:
     # shell=True to allow simple commands like `echo hi` or `sleep 2`
+    if on_slow is not None:
+        return _run_with_callback(cmd, timeout, on_slow, slow_after)
     completed = subprocess.run(
         cmd,
         shell=True,
@@ -24,4 +28,35 @@ def run_command(cmd: str, timeout: int | None = None) -> ExecResult:
         returncode=completed.returncode,
         stdout=completed.stdout or "",
         stderr=completed.stderr or "",
+    )
+
+
+def _run_with_callback(cmd: str, timeout: int | None, on_slow: Callable[[], None], slow_after: float) -> ExecResult:
+    """Like run_command, but calls on_slow() once if the command is still running after slow_after seconds."""
+    proc = subprocess.Popen(
+        cmd,
+        shell=True,
+        executable="/bin/bash" if os.name != "nt" else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    with proc:
+        try:
+            try:
+                stdout, stderr = proc.communicate(timeout=slow_after)
+            except subprocess.TimeoutExpired:
+                try:
+                    on_slow()
+                finally:
+                    remaining = None if timeout is None else max(timeout - slow_after, 0)
+                    stdout, stderr = proc.communicate(timeout=remaining)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+    return ExecResult(
+        returncode=proc.returncode,
+        stdout=stdout or "",
+        stderr=stderr or "",
     )
\ No newline at end of file
@@ -2,58 +2,23 @@ from __future__ import annotations
 import os
 import time
 import sqlite3
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import List, NamedTuple, Optional, Sequence, Tuple
 
-from rich.console import Console
-
-from ..db import get_connection
-from ..constants import JobState
+from ..db import get_connection, app_dir
+from ..constants import DEFAULTS, JobState, PROFILES_DIRNAME
 from ..config import get_value
 from ..util.ids import make_worker_id
+from ..util.fingerprint import error_fingerprint
+from ..util.time import now_ms, ms_after
+from ..deps import release_children, on_parent_dead, failure_policy
+from ..retry import Breaker, apply_breaker, backoff_seconds, retry_policy
 from .executor import run_command
+from .profiling import NullProfiler, WorkerProfiler
+from .eventlog import ERROR, INFO, WARNING, EventLog, close_sinks, open_sinks
 
-console = Console()
 
-
-# -----------------------
-# Time helpers (store UTC, SQLite-friendly)
-# -----------------------
-def _utcnow() -> datetime:
-    # naive UTC (no tzinfo) for consistent strftime below
-    return datetime.utcnow()
-
-def _iso(dt: datetime) -> str:
-    # Store as UTC "YYYY-MM-DD HH:MM:SS" so SQLite text compare works
-    return dt.strftime("%Y-%m-%d %H:%M:%S")
-
-def _parse_db_ts(ts: str) -> datetime:
-    """Parse timestamps we may encounter in DB:
-    - 'YYYY-MM-DD HH:MM:SS'  (our current storage, treated as UTC)
-    - 'YYYY-MM-DDTHH:MM:SS+00:00' (older rows)
-    - '...Z' (rare older rows)
-    Returns an aware datetime in UTC.
-    """
-    if ts is None:
-        return None  # caller should handle
-    try:
-        if "T" in ts:
-            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            return dt.astimezone(timezone.utc)
-        # plain format (UTC)
-        dt = datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
-        return dt
-    except Exception:
-        # Fallback: treat as now to avoid stalling
-        return _utcnow().replace(tzinfo=timezone.utc)
-
-def _to_ist(ts: str) -> str:
-    """Convert DB timestamp string (UTC) to IST string for display only."""
-    if ts is None:
-        return "—"
-    dt_utc = _parse_db_ts(ts)
-    ist = dt_utc.astimezone(timezone(timedelta(hours=5, minutes=30)))
-    return ist.strftime("%Y-%m-%d %H:%M:%S IST")
+def profiles_dir():
+    return app_dir() / PROFILES_DIRNAME
 
 
 def _intcfg(key: str, default: int) -> int:
@@ -67,16 +32,27 @@ def _intcfg(key: str, default: int) -> int:
 # -----------------------
 # Claim next job
 # -----------------------
-def _claim_next_job(conn: sqlite3.Connection, worker_id: str, lease_seconds: int) -> Optional[sqlite3.Row]:
+def _claim_next_job(conn: sqlite3.Connection, worker_id: str, lease_seconds: int,
+                    held: Sequence[str] = ()) -> Optional[sqlite3.Row]:
     """Atomically claim the next eligible job.
     Eligible if:
       - state IN (pending, failed) AND (next_run_at IS NULL OR next_run_at <= now)
       - OR state = processing AND (lease_expires_at IS NULL OR lease_expires_at <= now)  (stale lease)
+    `held` are finished jobs this worker still buffers; their leases are renewed
+    in the same transaction so they can't go stale while the next job runs.
     """
-    now_iso = _iso(_utcnow())
+    now = now_ms()
+    lease_expires = ms_after(lease_seconds, now)
     cur = conn.cursor()
     conn.execute("BEGIN IMMEDIATE")
 
+    if held:
+        cur.execute(
+            f"UPDATE jobs SET lease_expires_at = ? WHERE id IN ({','.join('?' * len(held))}) "
+            "AND state = ? AND worker_id = ?",
+            (lease_expires, *held, JobState.PROCESSING, worker_id),
+        )
+
     row = cur.execute(
         """
         SELECT id
@@ -88,7 +64,7 @@ def _claim_next_job(conn: sqlite3.Connection, worker_id: str, lease_seconds: int
         ORDER BY priority ASC, created_at ASC
         LIMIT 1
         """,
-        (JobState.PENDING, JobState.FAILED, now_iso, JobState.PROCESSING, now_iso),
+        (JobState.PENDING, JobState.FAILED, now, JobState.PROCESSING, now),
     ).fetchone()
 
     if not row:
@@ -96,7 +72,6 @@ def _claim_next_job(conn: sqlite3.Connection, worker_id: str, lease_seconds: int
         return None
 
     job_id = row[0]
-    lease_expires = _iso(_utcnow() + timedelta(seconds=lease_seconds))
 
     updated = cur.execute(
         """
@@ -110,9 +85,9 @@ def _claim_next_job(conn: sqlite3.Connection, worker_id: str, lease_seconds: int
               )
         """,
         (
-            JobState.PROCESSING, worker_id, lease_expires, now_iso, job_id,
-            JobState.PENDING, JobState.FAILED, now_iso,
-            JobState.PROCESSING, now_iso,
+            JobState.PROCESSING, worker_id, lease_expires, now, job_id,
+            JobState.PENDING, JobState.FAILED, now,
+            JobState.PROCESSING, now,
         ),
     )
 
@@ -128,123 +103,388 @@ def _claim_next_job(conn: sqlite3.Connection, worker_id: str, lease_seconds: int
 # -----------------------
 # Job state updates
 # -----------------------
-def _complete_job(conn: sqlite3.Connection, job_id: str):
-    now_iso = _iso(_utcnow())
-    conn.execute(
-        "UPDATE jobs SET state=?, updated_at=?, worker_id=NULL, lease_expires_at=NULL WHERE id=?",
-        (JobState.COMPLETED, now_iso, job_id),
-    )
+def _apply_complete(conn: sqlite3.Connection, job_id: str, now: int, owner: Optional[str] = None) -> int:
+    """Mark job completed and release its children; no commit.
+    With owner set, only applies if that worker still holds the job."""
+    sql = "UPDATE jobs SET state=?, updated_at=?, worker_id=NULL, lease_expires_at=NULL WHERE id=? AND state!=?"
+    params = [JobState.COMPLETED, now, job_id, JobState.COMPLETED]
+    if owner is not None:
+        sql += " AND worker_id=?"
+        params.append(owner)
+    updated = conn.execute(sql, params)
+    if updated.rowcount != 1:  # a stale duplicate run must not release twice
+        return 0
+    return release_children(conn, job_id, now)
+
+
+def _complete_job(conn: sqlite3.Connection, job_id: str) -> int:
+    """Mark job completed and release its children in the same transaction.
+    Returns the number of children that became ready."""
+    released = _apply_complete(conn, job_id, now_ms())
     conn.commit()
+    return released
+
+
+class RetryDecision(NamedTuple):
+    state: JobState
+    attempts: int
+    next_run_at: Optional[int]
+    message: str
+    delay_ms: Optional[int]  # the policy's delay, remembered for decorrelated jitter
 
 
-def _fail_or_retry_job(conn: sqlite3.Connection, job: sqlite3.Row, stderr: str):
-    now = _utcnow()
-    now_iso = _iso(now)
+class RetrySettings(NamedTuple):
+    backoff_base: int
+    max_backoff_seconds: int
+    policy: str  # global retry_policy; a job's own policy wins
+    dep_policy: str
+    breaker: Optional[Breaker]
+
+
+def _retry_settings() -> RetrySettings:
+    """Config used when a job fails; read once per worker, not once per failure."""
+    return RetrySettings(
+        _intcfg("backoff_base", 2),
+        _intcfg("max_backoff_seconds", 300),
+        retry_policy(get_value("retry_policy")) or DEFAULTS["retry_policy"],
+        failure_policy(get_value("dependency_failure_policy")),
+        _breaker(),
+    )
+
+
+def _retry_decision(job: sqlite3.Row, stderr: str, now: int, settings: RetrySettings) -> RetryDecision:
+    """Work out the next state, attempt count, retry time and message for a failed run."""
     attempts = int(job["attempts"]) + 1
     max_retries = int(job["max_retries"])
 
-    backoff_base = _intcfg("backoff_base", 2)
-    max_backoff_seconds = _intcfg("max_backoff_seconds", 300)
+    policy = retry_policy(job["retry_policy"]) or settings.policy
+    previous = job["retry_delay_ms"] / 1000 if job["retry_delay_ms"] else None
 
-    delay = min(backoff_base ** attempts, max_backoff_seconds)
-    next_run_at = _iso(now + timedelta(seconds=delay))
+    delay = backoff_seconds(policy, attempts, settings.backoff_base, settings.max_backoff_seconds, previous)
 
     # Decide new state and next_run_at
     if attempts >= max_retries:
         state = JobState.DEAD
         next_run_at_val = None  # allow NULL in schema
+        delay_ms = None
     else:
         state = JobState.FAILED
-        next_run_at_val = next_run_at
+        next_run_at_val = ms_after(delay, now)
+        delay_ms = int(delay * 1000)
 
     # Default message if command produced no output
     msg = (stderr or "").strip()
     if not msg:
         msg = "Command failed (no output)"
 
-    conn.execute(
-        """
+    return RetryDecision(state, attempts, next_run_at_val, msg[:4000], delay_ms)
+
+
+def _breaker() -> Optional[Breaker]:
+    """The configured per-error-class circuit breaker, or None when it is off."""
+    threshold = _intcfg("retry_breaker_threshold", 0)
+    if threshold <= 0:
+        return None
+    return Breaker(
+        threshold,
+        _intcfg("retry_breaker_window_seconds", 10) * 1000,
+        _intcfg("retry_breaker_cooldown_seconds", 30) * 1000,
+    )
+
+
+def _apply_fail(conn: sqlite3.Connection, job_id: str, decision: RetryDecision, now: int, dep_policy: str,
+                owner: Optional[str] = None, breaker: Optional[Breaker] = None) -> Optional[RetryDecision]:
+    """Write a retry decision (and the dependency failure policy); no commit.
+    Returns the decision as applied (the breaker may push next_run_at back), or None if skipped."""
+    fp = error_fingerprint(decision.message)
+    sql = """
         UPDATE jobs
-        SET state=?, attempts=?, next_run_at=?, last_error=?, updated_at=?, worker_id=NULL, lease_expires_at=NULL
+        SET state=?, attempts=?, next_run_at=?, last_error=?, error_fp=?, retry_delay_ms=?, updated_at=?,
+            worker_id=NULL, lease_expires_at=NULL
         WHERE id=?
-        """,
-        (state, attempts, next_run_at_val, msg[:4000], now_iso, job["id"]),
-    )
+        """
+    params = [decision.state, decision.attempts, decision.next_run_at, decision.message, fp,
+              decision.delay_ms, now, job_id]
+    if owner is not None:
+        sql += " AND worker_id=?"
+        params.append(owner)
+    if conn.execute(sql, params).rowcount != 1:
+        return None
+    if breaker is not None:
+        due = apply_breaker(conn, breaker, fp, now, decision.next_run_at)
+        if due != decision.next_run_at:
+            conn.execute("UPDATE jobs SET next_run_at=? WHERE id=?", (due, job_id))
+            decision = decision._replace(next_run_at=due)
+    if decision.state == JobState.DEAD:
+        on_parent_dead(conn, job_id, now, dep_policy)
+    return decision
+
+
+def _fail_or_retry_job(conn: sqlite3.Connection, job: sqlite3.Row, stderr: str,
+                       settings: Optional[RetrySettings] = None):
+    settings = settings or _retry_settings()
+    now = now_ms()
+    decision = _retry_decision(job, stderr, now, settings)
+    applied = _apply_fail(conn, job["id"], decision, now, settings.dep_policy, breaker=settings.breaker)
     conn.commit()
-    return state, attempts, next_run_at_val
+    return (applied or decision)[:3]
 
 
-def _heartbeat(conn: sqlite3.Connection, worker_id: str, hostname: str, pid: int):
-    now_iso = _iso(_utcnow())
+def _heartbeat(conn: sqlite3.Connection, worker_id: str, hostname: str, pid: int, commit: bool = True):
+    now = now_ms()
     conn.execute(
         """
         INSERT INTO workers(id, started_at, last_heartbeat_at, hostname, pid)
         VALUES(?, ?, ?, ?, ?)
         ON CONFLICT(id) DO UPDATE SET last_heartbeat_at=excluded.last_heartbeat_at
         """,
-        (worker_id, now_iso, now_iso, hostname, pid),
+        (worker_id, now, now, hostname, pid),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
+
+
+# -----------------------
+# Group commit (durability = batched)
+# -----------------------
+class GroupCommit:
+    """Buffers finished jobs and writes them in one transaction.
+
+    A flush happens once `max_jobs` outcomes are buffered, the oldest one is
+    `max_ms` old, the worker goes idle, or it exits, and also while the next
+    job is still running once it has run for `max_ms`. Until then the jobs stay
+    `processing` under this worker's lease (renewed with every claim and
+    extended by the flush window), so a crash only means the unflushed jobs
+    are re-claimed and re-run once their lease expires. Each write is guarded
+    by worker_id so a job that was re-claimed in the meantime is left alone.
+    The worker's heartbeat rides along in the same transaction.
+
+    Failures are only final once flushed (the breaker may still push a retry
+    back), so after each flush `failures` lists them as applied, for logging.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, worker_id: str, hostname: str, pid: int,
+                 max_jobs: int, max_ms: int, settings: Optional[RetrySettings] = None):
+        self.conn = conn
+        self.worker_id = worker_id
+        self.hostname = hostname
+        self.pid = pid
+        self.max_jobs = max(1, max_jobs)
+        self.max_ms = max_ms
+        self.settings = settings or _retry_settings()
+        self.failures: List[Tuple[str, RetryDecision, dict]] = []
+        self._ops: List[tuple] = []
+        self._oldest: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def held(self) -> List[str]:
+        """Ids of the buffered jobs, still leased to this worker."""
+        return [op[1] for op in self._ops]
+
+    def complete(self, job: sqlite3.Row) -> None:
+        self._push(("complete", job["id"], None, None))
+
+    def fail(self, job: sqlite3.Row, stderr: str, **fields) -> None:
+        """Buffer a failed run; `fields` come back with it in `failures` after the flush."""
+        decision = _retry_decision(job, stderr, now_ms(), self.settings)
+        self._push(("fail", job["id"], decision, fields))
+
+    def _push(self, op: tuple) -> None:
+        if not self._ops:
+            self._oldest = now_ms()
+        self._ops.append(op)
+
+    def due(self) -> bool:
+        if not self._ops:
+            return False
+        return len(self._ops) >= self.max_jobs or now_ms() - self._oldest >= self.max_ms
+
+    def flush(self) -> int:
+        """Apply everything buffered in one transaction. Returns released children."""
+        self.failures = []
+        if not self._ops:
+            return 0
+        now = now_ms()
+        released = 0
+        failures = []
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for kind, job_id, decision, fields in self._ops:
+                if kind == "complete":
+                    released += _apply_complete(self.conn, job_id, now, owner=self.worker_id)
+                    continue
+                applied = _apply_fail(self.conn, job_id, decision, now, self.settings.dep_policy,
+                                      owner=self.worker_id, breaker=self.settings.breaker)
+                if applied is not None:
+                    failures.append((job_id, applied, fields))
+            _heartbeat(self.conn, self.worker_id, self.hostname, self.pid, commit=False)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self._ops.clear()
+        self._oldest = None
+        self.failures = failures
+        return released
 
 
 # -----------------------
 # Main worker loop
 # -----------------------
-def worker_loop(stop_flag_path: str):
+def _fail(conn: sqlite3.Connection, batch: Optional[GroupCommit], job: sqlite3.Row, stderr: str,
+          settings: RetrySettings, fields: dict):
+    """Record a failed run. Returns (state, attempts, next_run_at) to log, or None
+    when batched: the failure is logged once a flush has applied it."""
+    if batch is None:
+        return _fail_or_retry_job(conn, job, stderr, settings)
+    batch.fail(job, stderr, **fields)
+    return None
+
+
+def _log_released(emit, released: int, job_id: Optional[str] = None) -> None:
+    if released:
+        emit("job.released", job=job_id, audit=True, count=released)
+
+
+def worker_loop(stop_flag_path: str, profile: bool = False, cprofile: bool = False, events=None):
+    """Run one worker until the stop flag appears.
+
+    `events` is the supervisor's multiprocessing queue for event batches; without
+    it the worker writes its own event file (and console output).
+    """
     worker_id = make_worker_id()
     hostname = os.uname().nodename if hasattr(os, "uname") else "win"
     pid = os.getpid()
 
     poll_interval_ms = _intcfg("poll_interval_ms", 500)
     lease_seconds = _intcfg("lease_seconds", 60)
-
-    console.log(f"[bold cyan][{worker_id}] started[/]")
-
-    conn = get_connection()
+    settings = _retry_settings()
+
+    prof = NullProfiler()
+    if profile or cprofile:
+        prof = WorkerProfiler(profiles_dir(), worker_id, use_cprofile=cprofile)
+    phase = prof.phase
+
+    sinks = open_sinks() if events is None else [events.put]
+    eventlog = EventLog.from_config(worker_id, sinks)
+
+    def emit(event: str, level: int = INFO, **fields) -> None:
+        with phase("log"):
+            eventlog.emit(event, level, **fields)
+
+    def log_failure(job_id: str, state: JobState, attempts: int, next_run_at: Optional[int], **fields) -> None:
+        if state == JobState.DEAD:
+            emit("job.dead", ERROR, job=job_id, audit=True, attempt=attempts, **fields)
+        else:
+            emit("job.retry", WARNING, job=job_id, audit=True, attempt=attempts, next_run_at=next_run_at, **fields)
+
+    def flush() -> None:
+        with phase("flush"):
+            released = batch.flush()
+        _log_released(emit, released)
+        for job_id, decision, fields in batch.failures:
+            log_failure(job_id, *decision[:3], **fields)
+
+    conn = prof.wrap_connection(get_connection())
+
+    batch: Optional[GroupCommit] = None
+    if (get_value("durability", "strict") or "strict").strip().lower() == "batched":
+        batch = GroupCommit(conn, worker_id, hostname, pid,
+                            _intcfg("batch_max_jobs", 50), _intcfg("batch_max_ms", 200), settings)
+        # the lease has to outlive the time a finished job may sit in the buffer
+        lease_seconds += -(-batch.max_ms // 1000)
+
+    extra = ", profiling" if prof.enabled else ""
+    emit("worker.started", detail=f"durability={'strict' if batch is None else 'batched'}{extra}",
+         hostname=hostname, pid=pid)
 
     try:
         while True:
             # graceful stop
             if os.path.exists(stop_flag_path):
-                console.log(f"[{worker_id}] stop flag detected → exiting when idle")
+                emit("worker.stopping")
                 break
 
-            _heartbeat(conn, worker_id, hostname, pid)
+            if batch is None:
+                with phase("heartbeat"):
+                    _heartbeat(conn, worker_id, hostname, pid)
+            elif batch.due():
+                flush()
 
-            job = _claim_next_job(conn, worker_id, lease_seconds)
+            with phase("claim"):
+                job = _claim_next_job(conn, worker_id, lease_seconds, batch.held() if batch else ())
             if not job:
+                if batch is not None:
+                    if len(batch):
+                        flush()  # going idle: don't sit on results
+                    else:
+                        with phase("heartbeat"):
+                            _heartbeat(conn, worker_id, hostname, pid)
+                prof.maybe_dump()
                 time.sleep(poll_interval_ms / 1000.0)
                 continue
 
             job_id = job["id"]
             command = job["command"]
-            console.log(f"[{worker_id}] Picked job: {job_id} | cmd: {command}")
-
+            emit("job.claimed", job=job_id, success=True, command=command, attempt=int(job["attempts"]) + 1)
+
+            def flush_while_running() -> None:
+                # a long job must not outlast the leases of the results buffered before it
+                if not len(batch):
+                    return
+                try:
+                    flush()
+                except Exception as e:  # the buffer is kept for the next flush; don't fail the running job
+                    emit("worker.flush_failed", WARNING, error=str(e), buffered=len(batch))
+
+            started = time.perf_counter()
             try:
-                result = run_command(command)
+                with phase("exec"):
+                    if batch is None:
+                        result = run_command(command)
+                    else:
+                        result = run_command(command, on_slow=flush_while_running,
+                                             slow_after=batch.max_ms / 1000.0)
+                duration_ms = round((time.perf_counter() - started) * 1000, 1)
                 if result.returncode == 0:
-                    _complete_job(conn, job_id)
-                    console.log(f"[{worker_id}]  completed: {job_id}")
-                else:
-                    state, attempts, next_run_at = _fail_or_retry_job(conn, job, result.stderr or result.stdout)
-                    if state == JobState.DEAD:
-                        console.log(f"[{worker_id}]  DLQ: {job_id} (attempts {attempts})")
+                    if batch is None:
+                        with phase("complete"):
+                            released = _complete_job(conn, job_id)
+                        emit("job.completed", job=job_id, audit=True, success=True, duration_ms=duration_ms)
+                        _log_released(emit, released, job_id)
                     else:
-                        # show UTC stored ts + IST display
-                        ist_display = _to_ist(next_run_at)
-                        console.log(f"[{worker_id}]  failed attempt {attempts}; retry at {next_run_at} ({ist_display})")
-            except Exception as e:
-                state, attempts, next_run_at = _fail_or_retry_job(conn, job, str(e))
-                if state == JobState.DEAD:
-                    console.log(f"[{worker_id}]  DLQ (exception): {job_id} (attempts {attempts})")
+                        with phase("complete"):
+                            batch.complete(job)
+                        emit("job.completed", job=job_id, audit=True, success=True, duration_ms=duration_ms)
                 else:
-                    ist_display = _to_ist(next_run_at)
-                    console.log(f"[{worker_id}]  exception; retry at {next_run_at} ({ist_display})")
+                    fields = {"exit_code": result.returncode, "duration_ms": duration_ms}
+                    with phase("fail"):
+                        outcome = _fail(conn, batch, job, result.stderr or result.stdout, settings, fields)
+                    if outcome is not None:
+                        log_failure(job_id, *outcome, **fields)
+            except Exception as e:
+                fields = {"exception": str(e)}
+                with phase("fail"):
+                    outcome = _fail(conn, batch, job, str(e), settings, fields)
+                if outcome is not None:
+                    log_failure(job_id, *outcome, **fields)
+            prof.job_done()
+            prof.maybe_dump()
 
     finally:
-        # Best-effort final heartbeat
+        # Flush buffered results, then best-effort final heartbeat
         try:
+            if batch is not None:
+                flush()
             _heartbeat(conn, worker_id, hostname, pid)
         except Exception:
             pass
-        console.log(f"[{worker_id}] exiting")
+        if prof.enabled:
+            prof.stop()
+            emit("worker.profile_written", path=str(profiles_dir()))
+        emit("worker.exiting")
+        eventlog.close()
+        if events is None:
+            close_sinks(sinks)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+import cProfile
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# -----------------------
+# Worker hot-path profiling (`queuectl worker start --profile`)
+# -----------------------
+# Phase timers wrap the steps of worker_loop; SQL statements are timed by a
+# thin proxy around the worker's connection. SQLite's trace callback has no
+# "statement finished" event, so it can't time anything on its own; instead a
+# progress handler (fires every PROGRESS_OPS VM instructions) tells us when
+# the VM actually started running. Time before the first tick is time spent
+# in SQLite's busy handler waiting for the write lock, which is reported as
+# the statement's busy wait. It is an estimate: statements too short to reach
+# a tick only count as waiting if they are BEGIN, whose whole job is taking
+# the lock. COMMIT never waits: under WAL the write lock is already held by
+# then, so its time is the WAL write and fsync, i.e. work.
+
+PROGRESS_OPS = 100
+DUMP_EVERY_SECONDS = 30.0
+_LOCK_STATEMENTS = ("BEGIN",)
+_COMMIT_STATEMENTS = ("COMMIT", "END")
+_WS = re.compile(r"\s+")
+
+_NULL_PHASE = nullcontext()
+
+
+def _normalize(sql: str) -> str:
+    return _WS.sub(" ", sql).strip()[:160]
+
+
+class _Stat:
+    __slots__ = ("count", "total", "max", "wait")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.wait = 0.0
+
+    def add(self, elapsed: float, wait: float = 0.0) -> None:
+        self.count += 1
+        self.total += elapsed
+        self.wait += wait
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def as_dict(self) -> dict:
+        return {"count": self.count, "total_s": self.total, "max_s": self.max, "wait_s": self.wait}
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off; every hook is a no-op."""
+
+    enabled = False
+
+    def phase(self, name: str):
+        return _NULL_PHASE
+
+    def wrap_connection(self, conn: sqlite3.Connection) -> sqlite3.Connection:
+        return conn
+
+    def job_done(self) -> None:
+        pass
+
+    def maybe_dump(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class WorkerProfiler(NullProfiler):
+    enabled = True
+
+    def __init__(self, out_dir: Path, worker_id: str, use_cprofile: bool = False):
+        self.out_dir = out_dir
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.worker_id = worker_id
+        self.pid = os.getpid()
+        self.phases: Dict[str, _Stat] = {}
+        self.statements: Dict[str, _Stat] = {}
+        self.jobs = 0
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._next_dump = self._t0 + DUMP_EVERY_SECONDS
+        self._first_tick: Optional[float] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        if use_cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    # ---- phases ----
+    @contextmanager
+    def phase(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            stat = self.phases.get(name)
+            if stat is None:
+                stat = self.phases[name] = _Stat()
+            stat.add(time.perf_counter() - t)
+
+    def job_done(self) -> None:
+        self.jobs += 1
+
+    # ---- SQL ----
+    def _on_progress(self) -> int:
+        if self._first_tick is None:
+            self._first_tick = time.perf_counter()
+        return 0  # keep going
+
+    def run_sql(self, fn: Callable, sql: str, *args):
+        self._first_tick = None
+        t = time.perf_counter()
+        try:
+            return fn(sql, *args)
+        finally:
+            end = time.perf_counter()
+            key = _normalize(sql)
+            verb = key.upper()
+            if verb.startswith(_COMMIT_STATEMENTS):
+                wait = 0.0
+            elif self._first_tick is not None:
+                wait = self._first_tick - t
+            else:
+                wait = end - t if verb.startswith(_LOCK_STATEMENTS) else 0.0
+            stat = self.statements.get(key)
+            if stat is None:
+                stat = self.statements[key] = _Stat()
+            stat.add(end - t, wait)
+
+    def wrap_connection(self, conn: sqlite3.Connection) -> "ProfiledConnection":
+        conn.set_progress_handler(self._on_progress, PROGRESS_OPS)
+        return ProfiledConnection(conn, self)
+
+    # ---- output ----
+    def snapshot(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "pid": self.pid,
+            "started": self.started,
+            "wall_s": time.perf_counter() - self._t0,
+            "jobs": self.jobs,
+            "phases": {k: v.as_dict() for k, v in self.phases.items()},
+            "statements": {k: v.as_dict() for k, v in self.statements.items()},
+        }
+
+    def dump(self) -> Path:
+        path = self.out_dir / f"worker-{self.pid}.json"
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self.snapshot(), indent=1))
+        os.replace(tmp, path)
+        return path
+
+    def maybe_dump(self) -> None:
+        now = time.perf_counter()
+        if now >= self._next_dump:
+            self._next_dump = now + DUMP_EVERY_SECONDS
+            self.dump()
+
+    def stop(self) -> None:
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(str(self.out_dir / f"worker-{self.pid}.prof"))
+            self._cprofile = None
+        self.dump()
+
+
+class _ProfiledCursor:
+    def __init__(self, cur: sqlite3.Cursor, prof: WorkerProfiler):
+        self._cur = cur
+        self._prof = prof
+
+    def execute(self, sql: str, *args):
+        self._prof.run_sql(self._cur.execute, sql, *args)
+        return self
+
+    def executemany(self, sql: str, *args):
+        self._prof.run_sql(self._cur.executemany, sql, *args)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+
+class ProfiledConnection:
+    """Forwards to a sqlite3.Connection, timing every statement."""
+
+    def __init__(self, conn: sqlite3.Connection, prof: WorkerProfiler):
+        self._conn = conn
+        self._prof = prof
+
+    def execute(self, sql: str, *args):
+        return self._prof.run_sql(self._conn.execute, sql, *args)
+
+    def executemany(self, sql: str, *args):
+        return self._prof.run_sql(self._conn.executemany, sql, *args)
+
+    def commit(self) -> None:
+        self._prof.run_sql(lambda sql: self._conn.commit(), "COMMIT")
+
+    def cursor(self, *args):
+        return _ProfiledCursor(self._conn.cursor(*args), self._prof)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# -----------------------
+# Report
+# -----------------------
+def load_profiles(out_dir: Path) -> List[dict]:
+    profiles = []
+    for path in sorted(out_dir.glob("worker-*.json")):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def merge_stats(profiles: List[dict], key: str) -> Dict[str, dict]:
+    merged: Dict[str, dict] = {}
+    for p in profiles:
+        for name, s in p.get(key, {}).items():
+            m = merged.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "wait_s": 0.0})
+            m["count"] += s["count"]
+            m["total_s"] += s["total_s"]
+            m["wait_s"] += s.get("wait_s", 0.0)
+            m["max_s"] = max(m["max_s"], s["max_s"])
+    return merged
@@ -0,0 +1,193 @@
+from __future__ import annotations
+import heapq
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..constants import JobState
+from ..config import get_value
+from ..util.cron import CronExpr
+from ..util.time import now_ms, from_ms, to_ms
+
+# cap on instances enqueued for one schedule in one tick (run_all catch-up)
+MAX_CATCHUP = 1000
+
+# jobs still in one of these states count as "running" for overlap_policy=skip
+ACTIVE_STATES = (JobState.WAITING, JobState.PENDING, JobState.PROCESSING, JobState.FAILED)
+
+
+def _cron_next(cron: CronExpr, after_ms: int) -> int:
+    # cron works on naive UTC datetimes at minute precision
+    return to_ms(cron.next_after(from_ms(after_ms).replace(tzinfo=None)))
+
+
+def first_fire(cron: Optional[str], interval_seconds: Optional[int], now: int) -> int:
+    """First fire time (epoch ms) for a newly created schedule."""
+    if cron:
+        return _cron_next(CronExpr.parse(cron), now)
+    return now + int(interval_seconds) * 1000
+
+
+def instance_id(schedule_id: str, fire: int) -> str:
+    """Deterministic job id per fire time; makes enqueueing idempotent across restarts."""
+    return f"{schedule_id}@{from_ms(fire).strftime('%Y%m%dT%H%M%SZ')}"
+
+
+class Scheduler:
+    """Fires recurring schedules from inside the supervisor.
+
+    Upcoming fire times live in a min-heap, so a tick costs O(1) when nothing
+    is due and O(log n) per fired schedule. The table is only re-read when a
+    cheap signature query (row count + newest updated_at) changes, i.e. when
+    someone ran `queuectl schedule add/remove`.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, batch_size: int = 200, reload_seconds: float = 5.0):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.reload_seconds = reload_seconds
+        self._heap: List[Tuple[int, str]] = []
+        self._rows: Dict[str, sqlite3.Row] = {}
+        self._crons: Dict[str, CronExpr] = {}
+        self._signature: Optional[tuple] = None
+        self._next_reload = 0.0
+        self._grace = 60_000
+        self._default_retries = 3
+
+    # ---- loading ----
+    def _read_signature(self) -> tuple:
+        return tuple(self.conn.execute("SELECT COUNT(*), MAX(updated_at) FROM schedules").fetchone())
+
+    def load(self) -> None:
+        self._grace = int(get_value("schedule_misfire_grace_seconds", "60")) * 1000
+        self._default_retries = int(get_value("max_retries", "3"))
+        self._signature = self._read_signature()
+        rows = self.conn.execute("SELECT * FROM schedules WHERE enabled=1").fetchall()
+        self._rows = {r["id"]: r for r in rows}
+        self._crons = {r["id"]: CronExpr.parse(r["cron"]) for r in rows if r["cron"]}
+        self._heap = [(r["next_fire_at"], r["id"]) for r in rows]
+        heapq.heapify(self._heap)
+        self._next_reload = time.monotonic() + self.reload_seconds
+
+    def maybe_reload(self) -> None:
+        if time.monotonic() < self._next_reload:
+            return
+        self._next_reload = time.monotonic() + self.reload_seconds
+        if self._read_signature() != self._signature:
+            self.load()
+
+    def seconds_until_next(self) -> Optional[float]:
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - now_ms()) / 1000.0)
+
+    # ---- firing ----
+    def _next(self, sid: str, after: int) -> int:
+        cron = self._crons.get(sid)
+        if cron:
+            return _cron_next(cron, after)
+        return after + int(self._rows[sid]["interval_seconds"]) * 1000
+
+    def _missed(self, sid: str, fire: int, now: int, keep: int) -> Tuple[List[int], int]:
+        """Return (the newest `keep` fire times in [fire, now], next fire time after now).
+
+        Never walks the whole backlog: intervals are computed arithmetically, and
+        cron schedules are stepped through from a window just before `now`,
+        widened only until it holds `keep` fire times.
+        """
+        if fire > now:
+            return [], fire
+        if sid not in self._crons:
+            step = int(self._rows[sid]["interval_seconds"]) * 1000
+            missed = (now - fire) // step + 1
+            return [fire + i * step for i in range(missed - min(missed, keep), missed)], fire + missed * step
+
+        window = max(self._grace, 60_000)
+        while True:
+            start = max(fire, now - window)
+            due: List[int] = []
+            t = fire if start == fire else self._next(sid, start - 1)
+            while t <= now:
+                due.append(t)
+                t = self._next(sid, t)
+            if len(due) >= keep or start == fire:
+                return due[len(due) - min(len(due), keep):], t
+            window *= 2
+
+    def _plan(self, sid: str, fire: int, now: int) -> Tuple[List[int], int]:
+        """Return (fire times to enqueue now, next fire time after now)."""
+        policy = self._rows[sid]["misfire_policy"]
+        if policy == "run_all":
+            return self._missed(sid, fire, now, MAX_CATCHUP)
+        if policy == "skip":
+            # only fires inside the grace period are kept, and no more than this fit in it
+            step = 60_000 if sid in self._crons else int(self._rows[sid]["interval_seconds"]) * 1000
+            due, t = self._missed(sid, fire, now, min(MAX_CATCHUP, self._grace // step + 1))
+            return [f for f in due if now - f < self._grace], t
+        return self._missed(sid, fire, now, 1)  # run_once: collapse the backlog into one run
+
+    def _busy(self, sid: str) -> bool:
+        marks = ",".join("?" * len(ACTIVE_STATES))
+        row = self.conn.execute(
+            f"SELECT 1 FROM jobs WHERE schedule_id=? AND state IN ({marks}) LIMIT 1",
+            (sid, *ACTIVE_STATES),
+        ).fetchone()
+        return row is not None
+
+    def tick(self) -> int:
+        """Enqueue everything that is due. Returns the number of jobs created."""
+        self.maybe_reload()
+        now = now_ms()
+        due: List[Tuple[int, str]] = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            due.append(heapq.heappop(self._heap))
+        if not due:
+            return 0
+
+        # plan before taking the write lock, so catch-up never stalls the workers' claims
+        plans = [(fire, sid, *self._plan(sid, fire, now)) for fire, sid in due]
+
+        created = 0
+        requeue: List[Tuple[int, str]] = []
+        stale = False
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for fire, sid, fires, next_fire in plans:
+                row = self._rows[sid]
+                if fires and row["overlap_policy"] == "skip" and self._busy(sid):
+                    fires = []
+
+                # compare-and-set: another supervisor may have fired this already, or it was paused
+                advanced = self.conn.execute(
+                    "UPDATE schedules SET next_fire_at=?, last_fired_at=COALESCE(?, last_fired_at) "
+                    "WHERE id=? AND next_fire_at=? AND enabled=1",
+                    (next_fire, fires[-1] if fires else None, sid, fire),
+                ).rowcount
+                if advanced != 1:
+                    stale = True
+                    continue
+
+                retries = row["max_retries"] if row["max_retries"] is not None else self._default_retries
+                for f in fires:
+                    created += self.conn.execute(
+                        """
+                        INSERT OR IGNORE INTO jobs(id, command, state, attempts, max_retries, priority,
+                                                   created_at, updated_at, next_run_at, schedule_id)
+                        VALUES(?, ?, ?, 0, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (instance_id(sid, f), row["command"], JobState.PENDING, retries,
+                         row["priority"], now, now, f, sid),
+                    ).rowcount
+                requeue.append((next_fire, sid))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            for entry in due:
+                heapq.heappush(self._heap, entry)
+            raise
+
+        for entry in requeue:
+            heapq.heappush(self._heap, entry)
+        if stale:
+            self.load()
+        return created
@@ -2,15 +2,18 @@ from __future__ import annotations
 import os
 import signal
 import time
-from multiprocessing import Process
+from multiprocessing import Process, Queue
 from pathlib import Path
 from typing import List
 
 from rich.console import Console
 
-from ..db import init_db
+from ..db import init_db, get_connection
+from ..config import get_value
 from ..constants import APP_DIRNAME
 from .process import worker_loop
+from .eventlog import EventCollector, open_sinks
+from .scheduler import Scheduler
 
 console = Console()
 
@@ -25,7 +28,7 @@ def stop_flag_path() -> Path:
     return _app_dir() / "stop.flag"
 
 
-def start_workers(count: int) -> None:
+def start_workers(count: int, profile: bool = False, cprofile: bool = False) -> None:
     init_db()
     # clear any previous stop flag
     try:
@@ -35,8 +38,13 @@ def start_workers(count: int) -> None:
 
     procs: List[Process] = []
 
+    # workers ship event batches here; the supervisor alone writes the log file and terminal
+    events: Queue = Queue()
+    collector = EventCollector(events, open_sinks())
+    collector.start()
+
     def _spawn() -> Process:
-        p = Process(target=worker_loop, args=(str(stop_flag_path()),), daemon=False)
+        p = Process(target=worker_loop, args=(str(stop_flag_path()), profile, cprofile, events), daemon=False)
         p.start()
         return p
 
@@ -45,10 +53,27 @@ def start_workers(count: int) -> None:
 
     console.log(f"Supervisor started {count} workers. Press CTRL+C to stop.")
 
+    scheduler = None
+    if get_value("scheduler_enabled", "1") not in ("0", "false", "no"):
+        scheduler = Scheduler(get_connection())
+        scheduler.load()
+
     try:
-        # Keep the supervisor alive while children run
+        # Keep the supervisor alive while children run; in between, fire due
+        # schedules and sleep until the next deadline (capped by the child check)
         while any(p.is_alive() for p in procs):
-            time.sleep(0.5)
+            sleep_for = 0.5
+            if scheduler is not None:
+                try:
+                    fired = scheduler.tick()
+                    if fired:
+                        console.log(f"Scheduler: enqueued {fired} scheduled job(s)")
+                except Exception as e:
+                    console.log(f"[red]Scheduler error:[/] {e}")
+                wait = scheduler.seconds_until_next()
+                if wait is not None:
+                    sleep_for = min(sleep_for, wait)
+            time.sleep(max(sleep_for, 0.01))
     except KeyboardInterrupt:
         console.log("Supervisor: CTRL+C received → graceful stop")
         request_stop()
@@ -60,6 +85,10 @@ def start_workers(count: int) -> None:
             stop_flag_path().unlink()
         except FileNotFoundError:
             pass
+        # workers are gone: write their last events and close the log
+        for p in procs:
+            p.join()
+        collector.stop()
 
 
 def request_stop() -> None:
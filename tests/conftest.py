@@ -0,0 +1,28 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from queuectl import db
+
+_session_dir = Path(tempfile.mkdtemp(prefix="queuectl-tests-"))
+
+
+def pytest_configure(config):
+    # models.Job reads config on import, i.e. while tests are collected and before any fixture runs
+    db._app_dir = _session_dir
+    db._db_path = _session_dir / db.DB_FILENAME
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_session_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def fresh_db(tmp_path_factory, monkeypatch):
+    """Give every test its own app directory and database instead of ~/.queuectl."""
+    app = tmp_path_factory.mktemp("queuectl")
+    monkeypatch.setattr(db, "_app_dir", app)
+    monkeypatch.setattr(db, "_db_path", app / db.DB_FILENAME)
+    db.init_db()
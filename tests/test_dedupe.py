@@ -0,0 +1,59 @@
+from queuectl.db import get_connection, set_config
+from queuectl.enqueue import enqueue_job
+from queuectl.worker.process import _claim_next_job, _fail_or_retry_job
+
+
+def _count(conn):
+    return conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+def test_duplicate_key_returns_existing_job():
+    assert enqueue_job('{"id":"a1","command":"true"}', dedupe_key="k") == "a1"
+    assert enqueue_job('{"id":"a2","command":"true"}', dedupe_key="k") == "a1"
+    assert _count(get_connection()) == 1
+
+
+def test_expired_key_is_taken_over():
+    set_config("dedupe_ttl_seconds", "-1")
+    enqueue_job('{"id":"a1","command":"true"}', dedupe_key="k")
+    assert enqueue_job('{"id":"a2","command":"true"}', dedupe_key="k") == "a2"
+    assert _count(get_connection()) == 2
+
+
+def test_coalesce_merges_only_while_pending():
+    enqueue_job('{"id":"r1","command":"true"}', dedupe_key="reindex:42", coalesce=True, priority=5)
+    assert enqueue_job('{"id":"r2","command":"true"}', dedupe_key="reindex:42", coalesce=True, priority=1) == "r1"
+
+    conn = get_connection()
+    assert conn.execute("SELECT priority FROM jobs WHERE id='r1'").fetchone()[0] == 1
+
+    # once r1 is running, a new submission schedules a fresh run
+    assert _claim_next_job(conn, "w1", 60)["id"] == "r1"
+    assert enqueue_job('{"id":"r3","command":"true"}', dedupe_key="reindex:42", coalesce=True) == "r3"
+
+
+def test_resubmitting_the_same_job_returns_it():
+    assert enqueue_job('{"id":"a1","command":"true"}', dedupe_key="k") == "a1"
+    assert enqueue_job('{"id":"a1","command":"true"}', dedupe_key="k") == "a1"
+
+    # in coalesce mode too, including once the job has started
+    assert enqueue_job('{"id":"r1","command":"true"}', dedupe_key="c", coalesce=True) == "r1"
+    assert enqueue_job('{"id":"r1","command":"true"}', dedupe_key="c", coalesce=True) == "r1"
+    conn = get_connection()
+    conn.execute("UPDATE jobs SET state='processing' WHERE id='r1'")
+    conn.commit()
+    assert enqueue_job('{"id":"r1","command":"true"}', dedupe_key="c", coalesce=True) == "r1"
+    assert _count(conn) == 2
+
+
+def test_coalesce_does_not_pull_a_failed_job_out_of_backoff():
+    enqueue_job('{"id":"r1","command":"false"}', dedupe_key="k", coalesce=True)
+    conn = get_connection()
+    job = _claim_next_job(conn, "w1", 60)
+    _fail_or_retry_job(conn, job, "boom")
+    backoff_until = conn.execute("SELECT next_run_at FROM jobs WHERE id='r1'").fetchone()[0]
+
+    # the failed job has run already: the key is taken over for a fresh run
+    assert enqueue_job('{"id":"r2","command":"false"}', dedupe_key="k", coalesce=True) == "r2"
+    row = conn.execute("SELECT state, next_run_at FROM jobs WHERE id='r1'").fetchone()
+    assert (row["state"], row["next_run_at"]) == ("failed", backoff_until)
@@ -0,0 +1,56 @@
+from queuectl.db import get_connection
+from queuectl.enqueue import enqueue_job
+from queuectl.worker.process import _claim_next_job, _complete_job, _fail_or_retry_job
+
+
+def _state(conn, job_id):
+    return conn.execute("SELECT state, remaining_deps FROM jobs WHERE id=?", (job_id,)).fetchone()
+
+
+def test_child_waits_until_all_parents_complete():
+    enqueue_job('{"id":"a","command":"true"}')
+    enqueue_job('{"id":"b","command":"true"}')
+    enqueue_job('{"id":"c","command":"true"}', depends_on=["a", "b"])
+
+    conn = get_connection()
+    assert tuple(_state(conn, "c")) == ("waiting", 2)
+
+    _complete_job(conn, "a")
+    assert tuple(_state(conn, "c")) == ("waiting", 1)
+
+    # completing the same parent again (stale lease re-run) must not double-release
+    _complete_job(conn, "a")
+    assert tuple(_state(conn, "c")) == ("waiting", 1)
+
+    assert _complete_job(conn, "b") == 1
+    assert tuple(_state(conn, "c")) == ("pending", 0)
+
+
+def test_unknown_parent_is_rejected():
+    assert enqueue_job('{"id":"orphan","command":"true"}', depends_on=["nope"]) is None
+    conn = get_connection()
+    assert conn.execute("SELECT 1 FROM jobs WHERE id='orphan'").fetchone() is None
+
+
+def test_payload_depends_on_takes_a_single_id():
+    enqueue_job('{"id":"ab","command":"true"}')
+    # a plain string is one parent, not the characters "a" and "b"
+    enqueue_job('{"id":"c","command":"true","depends_on":"ab"}')
+    conn = get_connection()
+    assert tuple(_state(conn, "c")) == ("waiting", 1)
+    assert enqueue_job('{"id":"d","command":"true","depends_on":{"ab":1}}') is None
+
+
+def test_dead_parent_cascades_to_descendants():
+    enqueue_job('{"id":"p","command":"false"}', max_retries=1)
+    enqueue_job('{"id":"c1","command":"true"}', depends_on=["p"])
+    enqueue_job('{"id":"c2","command":"true"}', depends_on=["c1"])
+
+    conn = get_connection()
+    job = _claim_next_job(conn, "w1", 60)
+    assert job["id"] == "p"
+    state, _, _ = _fail_or_retry_job(conn, job, "boom")
+
+    assert state == "dead"
+    assert _state(conn, "c1")["state"] == "dead"
+    assert _state(conn, "c2")["state"] == "dead"
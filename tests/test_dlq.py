@@ -0,0 +1,94 @@
+import pytest
+
+from queuectl.commands.dlq import dlq_purge, dlq_retry
+from queuectl.db import get_connection, set_config
+from queuectl.util.fingerprint import error_fingerprint
+from queuectl.util.time import now_ms
+
+
+def _dead(conn, job_id, error, died_ms_ago=0):
+    ts = now_ms() - died_ms_ago
+    conn.execute(
+        "INSERT INTO jobs(id, command, state, attempts, created_at, updated_at, last_error, error_fp) "
+        "VALUES(?, 'true', 'dead', 3, ?, ?, ?, ?)",
+        (job_id, ts, ts, error, error_fingerprint(error)),
+    )
+
+
+def test_fingerprint_masks_run_specific_details():
+    a = error_fingerprint("Traceback ...\nConnectionError: host 'db1' port 5432 refused after 3.5s")
+    b = error_fingerprint("ConnectionError: host 'db2' port 6543 refused after 10s")
+    assert a == b == "ConnectionError: host <str> port <n> refused after <n>s"
+    assert error_fingerprint("bash: /opt/app/run.sh: Permission denied") == "bash: <path>: Permission denied"
+
+
+def test_bulk_retry_by_class_is_paced():
+    conn = get_connection()
+    for i in range(5):
+        _dead(conn, f"conn{i}", f"ConnectionError: port {i} refused")
+    _dead(conn, "perm", "bash: /x/y.sh: Permission denied")
+    conn.commit()
+
+    dlq_retry(error_class="ConnectionError: port <n> refused", rate=10, chunk=2)
+
+    rows = conn.execute("SELECT id, state, next_run_at FROM jobs ORDER BY next_run_at").fetchall()
+    states = {r["id"]: r["state"] for r in rows}
+    assert states.pop("perm") == "dead"
+    assert set(states.values()) == {"pending"}
+    due = sorted(r["next_run_at"] for r in rows if r["id"] != "perm")
+    assert [b - a for a, b in zip(due, due[1:])] == [100] * 4
+
+
+def test_purge_older_than_drops_jobs_and_edges():
+    conn = get_connection()
+    _dead(conn, "old", "boom", died_ms_ago=3 * 86_400_000)
+    _dead(conn, "new", "boom")
+    conn.execute("INSERT INTO job_deps(parent_id, child_id) VALUES('old', 'new')")
+    conn.commit()
+
+    dlq_purge(older_than="2d")
+
+    assert [r[0] for r in conn.execute("SELECT id FROM jobs")] == ["new"]
+    assert conn.execute("SELECT COUNT(*) FROM job_deps").fetchone()[0] == 0
+
+
+def test_bulk_operations_need_an_explicit_selection():
+    conn = get_connection()
+    _dead(conn, "a", "boom")
+    conn.commit()
+    dlq_purge()
+    dlq_retry("a", all_=True)
+    assert conn.execute("SELECT state FROM jobs").fetchone()[0] == "dead"
+
+
+@pytest.mark.parametrize("policy, child_state", [("block", "dead"), ("ignore", "pending")])
+def test_purge_settles_waiting_children(policy, child_state):
+    set_config("dependency_failure_policy", policy)
+    conn = get_connection()
+    _dead(conn, "p", "boom")
+    conn.execute(
+        "INSERT INTO jobs(id, command, state, created_at, updated_at, remaining_deps) "
+        "VALUES('c', 'true', 'waiting', 0, 0, 1)"
+    )
+    conn.execute("INSERT INTO job_deps(parent_id, child_id) VALUES('p', 'c')")
+    conn.commit()
+
+    dlq_purge("p")
+
+    row = conn.execute("SELECT state, remaining_deps FROM jobs WHERE id='c'").fetchone()
+    assert (row["state"], row["remaining_deps"]) == (child_state, 0)
+    assert conn.execute("SELECT COUNT(*) FROM job_deps").fetchone()[0] == 0
+
+
+def test_error_like_is_a_literal_substring():
+    conn = get_connection()
+    _dead(conn, "a", "OSError: file_not_found: /tmp/x")
+    _dead(conn, "b", "OSError: file not found")
+    _dead(conn, "c", "disk 100% full")
+    conn.commit()
+
+    dlq_retry(error_like="file_not", rate=0)
+    dlq_retry(error_like="0%", rate=0)
+
+    states = dict(conn.execute("SELECT id, state FROM jobs").fetchall())
+    assert states == {"a": "pending", "b": "dead", "c": "pending"}
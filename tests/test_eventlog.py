@@ -0,0 +1,85 @@
+import io
+import json
+import queue
+
+from rich.console import Console
+
+from queuectl.worker.eventlog import ERROR, WARNING, ConsoleSink, EventCollector, EventLog, RotatingFileSink
+
+
+def _capture(**kwargs):
+    seen = []
+    log = EventLog("w1", [seen.extend], **kwargs)
+    return log, seen
+
+
+def test_sampling_never_drops_audit_events():
+    log, seen = _capture(sample_rate=0.0)
+    log.emit("job.claimed", job="a", success=True, command="true")
+    log.emit("job.completed", job="a", audit=True, success=True)
+    log.emit("job.retry", WARNING, job="b", audit=True, attempt=1)
+    log.close()
+
+    assert [(show, rec["event"]) for show, rec in seen] == [
+        (False, "job.completed"),  # written to the file, not shown on the console
+        (True, "job.retry"),
+    ]
+
+
+def test_sampled_jobs_keep_their_whole_trace():
+    log, seen = _capture(sample_rate=0.5)
+    for i in range(200):
+        log.emit("job.claimed", job=f"j{i}", success=True)
+        log.emit("job.completed", job=f"j{i}", audit=True, success=True)
+    log.close()
+
+    shown = [rec["job"] for show, rec in seen if show]
+    claimed = {rec["job"] for show, rec in seen if rec["event"] == "job.claimed"}
+    assert 50 < len(claimed) < 150
+    # a sampled job shows both its events; the others show neither
+    assert sorted(shown) == sorted(list(claimed) * 2)
+    assert sum(rec["event"] == "job.completed" for _, rec in seen) == 200
+
+
+def test_level_filter():
+    log, seen = _capture(level="warning")
+    log.emit("worker.started")
+    log.emit("job.dead", ERROR, job="a", audit=True)
+    log.close()
+    assert [(show, rec["event"], rec["level"]) for show, rec in seen] == [(True, "job.dead", "error")]
+
+
+def test_file_sink_writes_json_lines_and_rotates(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = RotatingFileSink(path, max_bytes=300, backups=2)
+    for i in range(20):
+        sink([(True, {"ts": 0, "level": "info", "event": "job.completed", "worker": "w1", "job": f"j{i}"})])
+    sink.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["events.jsonl", "events.jsonl.1", "events.jsonl.2"]
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines[-1]["job"] == "j19"
+    assert lines[-1]["ts"] == "1970-01-01T00:00:00.000+00:00"
+
+
+def test_collector_sheds_console_but_not_the_file_when_behind():
+    def event(name, level="info"):
+        return (True, {"ts": 0, "level": level, "event": name, "worker": "w1", "job": "a"})
+
+    q = queue.Queue()
+    for _ in range(5):
+        q.put([event("job.claimed"), event("job.completed")])
+    q.put([event("job.retry", "warning")])
+    written = []
+    out = io.StringIO()
+    collector = EventCollector(q, [written.extend, ConsoleSink(Console(file=out, width=200))], max_backlog=2)
+    collector.start()
+    collector.stop()
+
+    assert len(written) == 11
+    lines = out.getvalue().splitlines()
+    # the first batches were read with more than two waiting: only the warning is rendered
+    # then, and the skipped lines are accounted for once the console is caught up
+    assert sum("completed: a" in line for line in lines) < 5
+    assert any("retry at" in line for line in lines)
+    assert any("below warning not shown" in line for line in lines)
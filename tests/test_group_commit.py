@@ -0,0 +1,124 @@
+import gc
+import sqlite3
+
+from queuectl.config import get_value
+from queuectl.db import get_connection, set_config
+from queuectl.enqueue import enqueue_job
+from queuectl.worker import process
+from queuectl.worker.executor import ExecResult, run_command
+from queuectl.worker.process import GroupCommit, _claim_next_job
+
+
+def _states(conn):
+    return dict(conn.execute("SELECT id, state FROM jobs ORDER BY id").fetchall())
+
+
+def test_results_are_written_only_on_flush():
+    enqueue_job('{"id":"a","command":"true"}')
+    enqueue_job('{"id":"b","command":"false"}')
+    enqueue_job('{"id":"c","command":"true"}', depends_on=["a"])
+
+    conn = get_connection()
+    batch = GroupCommit(conn, "w1", "host", 1, max_jobs=2, max_ms=60_000)
+    batch.complete(_claim_next_job(conn, "w1", 60))
+    assert not batch.due()
+    batch.fail(_claim_next_job(conn, "w1", 60), "boom")
+    assert batch.due()
+
+    # nothing is visible until the group is flushed
+    assert _states(get_connection()) == {"a": "processing", "b": "processing", "c": "waiting"}
+    assert batch.flush() == 1
+    assert _states(get_connection()) == {"a": "completed", "b": "failed", "c": "pending"}
+
+
+def test_flush_skips_jobs_reclaimed_by_another_worker():
+    enqueue_job('{"id":"a","command":"true"}')
+    conn = get_connection()
+    batch = GroupCommit(conn, "w1", "host", 1, max_jobs=10, max_ms=60_000)
+    batch.complete(_claim_next_job(conn, "w1", 60))
+
+    # w1 stalled past its lease and w2 picked the job up again
+    conn.execute("UPDATE jobs SET worker_id='w2' WHERE id='a'")
+    conn.commit()
+    batch.flush()
+    assert _states(conn) == {"a": "processing"}
+
+
+def test_long_job_does_not_outlive_buffered_leases():
+    enqueue_job('{"id":"a","command":"true"}')
+    enqueue_job('{"id":"b","command":"sleep 1.5"}')
+    conn = get_connection()
+    batch = GroupCommit(conn, "w1", "host", 1, max_jobs=10, max_ms=200)
+    batch.complete(_claim_next_job(conn, "w1", 1))
+
+    # claiming b renews a's lease, and a is flushed while b is still running
+    b = _claim_next_job(conn, "w1", 1, batch.held())
+    assert b["id"] == "b"
+    run_command(b["command"], on_slow=batch.flush, slow_after=batch.max_ms / 1000)
+    assert len(batch) == 0
+
+    # b outran its 1 s lease and may be re-claimed, but a finished and must not run again
+    other = get_connection()
+    assert _claim_next_job(other, "w2", 60)["id"] == "b"
+    assert _states(other) == {"a": "completed", "b": "processing"}
+
+
+def test_claim_renews_leases_of_buffered_jobs():
+    enqueue_job('{"id":"a","command":"true"}')
+    conn = get_connection()
+    batch = GroupCommit(conn, "w1", "host", 1, max_jobs=10, max_ms=60_000)
+    batch.complete(_claim_next_job(conn, "w1", 60))
+    conn.execute("UPDATE jobs SET lease_expires_at = 0 WHERE id='a'")
+    conn.commit()
+
+    assert _claim_next_job(conn, "w1", 60, batch.held()) is None
+    assert _claim_next_job(get_connection(), "w2", 60) is None
+
+
+def test_failed_flush_during_a_job_does_not_fail_it(tmp_path, monkeypatch):
+    set_config("durability", "batched")
+    set_config("log_console", "0")
+    enqueue_job('{"id":"a","command":"true"}')
+    enqueue_job('{"id":"b","command":"true"}')
+    stop_flag = tmp_path / "stop.flag"
+
+    real_flush = GroupCommit.flush
+    calls = []
+
+    def flaky_flush(self):
+        calls.append(len(self))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real_flush(self)
+
+    def fake_run(command, on_slow=None, slow_after=0.0):
+        on_slow()  # every job counts as slow: the buffer is flushed while it "runs"
+        if calls:
+            stop_flag.touch()
+        return ExecResult(0, "", "")
+
+    monkeypatch.setattr(GroupCommit, "flush", flaky_flush)
+    monkeypatch.setattr(process, "run_command", fake_run)
+    process.worker_loop(str(stop_flag))
+
+    conn = get_connection()
+    assert calls[0] == 1  # a's result, the flush that failed while b was running
+    rows = conn.execute("SELECT id, state, attempts FROM jobs ORDER BY id").fetchall()
+    assert [tuple(r) for r in rows] == [("a", "completed", 0), ("b", "completed", 0)]
+
+
+def test_config_reads_leave_no_connection_behind():
+    # a lingering handle is closed by some later GC pass, and that drops the worker's
+    # locks on the DB file: other processes then checkpoint the WAL out from under it
+    def open_connections():
+        return sum(isinstance(o, sqlite3.Connection) for o in gc.get_objects())
+
+    gc.collect()
+    gc.disable()
+    try:
+        before = open_connections()
+        set_config("durability", "batched")
+        assert get_value("durability") == "batched"
+        assert open_connections() == before
+    finally:
+        gc.enable()
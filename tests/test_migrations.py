@@ -0,0 +1,94 @@
+import sqlite3
+
+import pytest
+
+from queuectl import db
+from queuectl.db import get_connection, init_db
+from queuectl.migrations import _rebuild_with_epoch_ms
+from queuectl.util.time import parse_ts
+
+# schema as shipped before versioning: text timestamps in two formats
+LEGACY = """
+CREATE TABLE jobs (
+    id TEXT PRIMARY KEY, command TEXT NOT NULL, state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0, max_retries INTEGER NOT NULL DEFAULT 3,
+    priority INTEGER NOT NULL DEFAULT 5, created_at TEXT NOT NULL, updated_at TEXT NOT NULL,
+    next_run_at TEXT, last_error TEXT, worker_id TEXT, lease_expires_at TEXT
+);
+CREATE TABLE workers (
+    id TEXT PRIMARY KEY, started_at TEXT NOT NULL, last_heartbeat_at TEXT NOT NULL,
+    hostname TEXT, pid INTEGER
+);
+CREATE TABLE config (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+INSERT INTO jobs(id, command, state, created_at, updated_at, next_run_at)
+    VALUES ('plain', 'true', 'pending', '2025-01-10 10:00:00', '2025-01-10 10:00:00', '2025-01-10 10:05:00');
+INSERT INTO jobs(id, command, state, created_at, updated_at, next_run_at)
+    VALUES ('iso', 'true', 'dead', '2025-01-10T10:00:00+00:00', '2025-01-10T10:00:00+00:00', NULL);
+INSERT INTO workers VALUES ('w1', '2025-01-10 09:00:00', '2025-01-10T09:30:00+00:00', 'h', 1);
+"""
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    path = tmp_path / "queue.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY)
+    conn.close()
+    monkeypatch.setattr(db, "_db_path", path)
+    return path
+
+
+def test_text_timestamps_become_epoch_ms(legacy_db):
+    init_db()
+    conn = get_connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+
+    row = conn.execute("SELECT * FROM jobs WHERE id='plain'").fetchone()
+    assert row["created_at"] == parse_ts("2025-01-10 10:00:00")
+    assert row["next_run_at"] == parse_ts("2025-01-10 10:05:00")
+    iso = conn.execute("SELECT created_at, next_run_at FROM jobs WHERE id='iso'").fetchone()
+    assert tuple(iso) == (parse_ts("2025-01-10 10:00:00"), None)
+    assert (row["remaining_deps"], row["schedule_id"]) == (0, None)
+    hb = conn.execute("SELECT last_heartbeat_at, typeof(last_heartbeat_at) FROM workers").fetchone()
+    assert tuple(hb) == (parse_ts("2025-01-10 09:30:00"), "integer")
+
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert "idx_jobs_state_next" in indexes
+
+
+def test_writes_during_backfill_are_mirrored(legacy_db):
+    conn = sqlite3.connect(legacy_db)
+    _rebuild_with_epoch_ms(conn, "jobs", chunk_rows=1)
+
+    # an old-version worker keeps writing text timestamps mid-migration
+    conn.execute("UPDATE jobs SET state='completed', updated_at='2025-01-10 11:00:00' WHERE id='plain'")
+    conn.execute(
+        "INSERT INTO jobs(id, command, state, created_at, updated_at) "
+        "VALUES ('late', 'true', 'pending', '2025-01-10 11:00:00', '2025-01-10 11:00:00')"
+    )
+    conn.execute("DELETE FROM jobs WHERE id='iso'")
+    conn.commit()
+
+    init_db()
+    rows = {r["id"]: r for r in get_connection().execute("SELECT * FROM jobs")}
+    assert set(rows) == {"plain", "late"}
+    assert rows["plain"]["state"] == "completed"
+    assert rows["plain"]["updated_at"] == parse_ts("2025-01-10 11:00:00")
+
+
+def test_error_fingerprints_are_backfilled(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "_db_path", tmp_path / "v1.db")
+    init_db()
+    conn = get_connection()
+    conn.execute(
+        "INSERT INTO jobs(id, command, state, created_at, updated_at, last_error) "
+        "VALUES ('a', 'false', 'dead', 0, 0, 'exit code 2')"
+    )
+    conn.execute("PRAGMA user_version = 1")  # as left by a v1 build: no fingerprints
+    conn.commit()
+
+    monkeypatch.setattr(db, "_initialized_path", None)
+    init_db()
+    conn = get_connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+    assert conn.execute("SELECT error_fp FROM jobs").fetchone()[0] == "exit code <n>"
@@ -0,0 +1,33 @@
+from queuectl.db import get_connection
+from queuectl.enqueue import enqueue_job
+from queuectl.worker.process import _claim_next_job, _complete_job
+from queuectl.worker.profiling import WorkerProfiler, load_profiles, merge_stats
+
+
+def test_profiler_times_statements_and_phases(tmp_path):
+    enqueue_job('{"id":"a","command":"true"}')
+    prof = WorkerProfiler(tmp_path / "profiles", "w1")
+    conn = prof.wrap_connection(get_connection())
+
+    with prof.phase("claim"):
+        job = _claim_next_job(conn, "w1", 60)
+    with prof.phase("complete"):
+        _complete_job(conn, job["id"])
+    prof.job_done()
+    prof.stop()
+
+    assert get_connection().execute("SELECT state FROM jobs WHERE id='a'").fetchone()[0] == "completed"
+    [snap] = load_profiles(tmp_path / "profiles")
+    assert snap["jobs"] == 1
+    assert set(snap["phases"]) == {"claim", "complete"}
+    assert snap["statements"]["COMMIT"]["count"] >= 1
+    # the lock is already held at COMMIT: its time is WAL work, not busy wait
+    assert snap["statements"]["COMMIT"]["wait_s"] == 0.0
+    assert snap["statements"]["BEGIN IMMEDIATE"]["wait_s"] > 0.0
+    assert any(sql.startswith("UPDATE jobs") for sql in snap["statements"])
+
+
+def test_merge_stats_sums_across_workers():
+    a = {"phases": {"exec": {"count": 2, "total_s": 1.0, "max_s": 0.75, "wait_s": 0.0}}}
+    b = {"phases": {"exec": {"count": 1, "total_s": 0.5, "max_s": 0.5, "wait_s": 0.0}}}
+    assert merge_stats([a, b], "phases")["exec"] == {"count": 3, "total_s": 1.5, "max_s": 0.75, "wait_s": 0.0}
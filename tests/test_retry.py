@@ -0,0 +1,79 @@
+import random
+
+from queuectl.db import get_connection, set_config
+from queuectl.enqueue import enqueue_job
+from queuectl.retry import Breaker, apply_breaker, backoff_seconds
+from queuectl.worker import process
+from queuectl.worker.process import GroupCommit, _claim_next_job, _fail_or_retry_job, _retry_settings
+
+
+def test_policy_delays():
+    rng = random.Random(0)
+    assert [backoff_seconds("exponential", n, 2, 300) for n in (1, 2, 3, 10)] == [2, 4, 8, 300]
+    assert [backoff_seconds("linear", n, 2, 300) for n in (1, 2, 3)] == [2, 4, 6]
+    assert [backoff_seconds("fixed", n, 2, 300) for n in (1, 2, 3)] == [2, 2, 2]
+    for _ in range(100):
+        assert 0 <= backoff_seconds("full_jitter", 3, 2, 300, rng=rng) <= 8
+        assert 2 <= backoff_seconds("decorrelated_jitter", 3, 2, 300, previous=5, rng=rng) <= 15
+    assert backoff_seconds("decorrelated_jitter", 9, 2, 10, previous=100, rng=rng) <= 10
+
+
+def test_per_job_policy_overrides_config():
+    enqueue_job('{"id":"a","command":"false"}', max_retries=5, retry_policy="linear")
+    conn = get_connection()
+    job = _claim_next_job(conn, "w1", 60)
+    _fail_or_retry_job(conn, job, "boom")
+    row = conn.execute("SELECT retry_policy, retry_delay_ms, attempts FROM jobs").fetchone()
+    assert tuple(row) == ("linear", 2000, 1)
+
+
+def test_unknown_policy_is_rejected():
+    assert enqueue_job('{"id":"a","command":"true","retry_policy":"yolo"}') is None
+
+
+def test_breaker_holds_and_spreads_retries_of_a_failing_class():
+    conn = get_connection()
+    breaker = Breaker(threshold=3, window_ms=10_000, cooldown_ms=30_000)
+    rng = random.Random(0)
+    now = 1_000_000
+    # the first failures retry on their own schedule
+    assert apply_breaker(conn, breaker, "db down", now, now + 2000, rng) == now + 2000
+    assert apply_breaker(conn, breaker, "db down", now, now + 2000, rng) == now + 2000
+    # the third trips the breaker: retries wait out the cooldown, then spread over one more
+    held = [apply_breaker(conn, breaker, "db down", now, now + 2000, rng) for _ in range(20)]
+    assert all(now + 30_000 <= t <= now + 60_000 for t in held)
+    assert len(set(held)) > 1
+    # other classes are unaffected
+    assert apply_breaker(conn, breaker, "disk full", now, now + 2000, rng) == now + 2000
+
+
+def test_failures_do_not_read_config_per_job(monkeypatch):
+    set_config("retry_policy", "fixed")
+    settings = _retry_settings()
+    enqueue_job('{"id":"a","command":"false"}')
+    conn = get_connection()
+    job = _claim_next_job(conn, "w1", 60)
+
+    def no_config(*args):
+        raise AssertionError("config read on the failure path")
+
+    monkeypatch.setattr(process, "get_value", no_config)
+    _fail_or_retry_job(conn, job, "boom", settings)
+    assert conn.execute("SELECT retry_delay_ms FROM jobs").fetchone()[0] == 2000
+
+
+def test_batched_failures_report_the_breaker_delay():
+    set_config("retry_policy", "fixed")
+    set_config("retry_breaker_threshold", "1")
+    enqueue_job('{"id":"a","command":"false"}')
+    conn = get_connection()
+    batch = GroupCommit(conn, "w1", "host", 1, max_jobs=10, max_ms=60_000)
+    batch.fail(_claim_next_job(conn, "w1", 60), "db down", exit_code=1)
+    batch.flush()
+
+    # the breaker tripped on the first failure and held the retry past its 30 s cooldown;
+    # what the worker logs is that time, not the policy's 2 s
+    [(job_id, decision, fields)] = batch.failures
+    row = conn.execute("SELECT next_run_at, updated_at FROM jobs WHERE id='a'").fetchone()
+    assert (job_id, fields) == ("a", {"exit_code": 1})
+    assert decision.next_run_at == row["next_run_at"] >= row["updated_at"] + 30_000
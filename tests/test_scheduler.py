@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from queuectl.db import get_connection
+from queuectl.util.cron import CronExpr
+from queuectl.util.time import to_ms
+from queuectl.worker import scheduler as sched
+from queuectl.worker.scheduler import Scheduler
+
+
+def test_cron_next_after():
+    base = datetime(2025, 1, 31, 23, 58)
+    assert CronExpr.parse("*/15 * * * *").next_after(base) == datetime(2025, 2, 1, 0, 0)
+    assert CronExpr.parse("30 9 * * 1-5").next_after(base) == datetime(2025, 2, 3, 9, 30)  # Monday
+    assert CronExpr.parse("@monthly").next_after(base) == datetime(2025, 2, 1, 0, 0)
+    with pytest.raises(ValueError):
+        CronExpr.parse("61 * * * *")
+
+
+def _add(conn, sid, next_fire, misfire="run_once", interval=60):
+    ts = to_ms(next_fire)
+    conn.execute(
+        """INSERT INTO schedules(id, command, interval_seconds, misfire_policy, next_fire_at, created_at, updated_at)
+           VALUES(?, 'true', ?, ?, ?, ?, ?)""",
+        (sid, interval, misfire, ts, ts, ts),
+    )
+    conn.commit()
+
+
+def _jobs(conn, sid):
+    return [r[0] for r in conn.execute("SELECT id FROM jobs WHERE schedule_id=? ORDER BY id", (sid,))]
+
+
+def test_misfire_policies_and_restart_idempotency(monkeypatch):
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    monkeypatch.setattr(sched, "now_ms", lambda: to_ms(now))
+    conn = get_connection()
+    # supervisor was down for 5 minutes
+    _add(conn, "once", now - timedelta(minutes=5), "run_once")
+    _add(conn, "all", now - timedelta(minutes=5), "run_all")
+    _add(conn, "skip", now - timedelta(minutes=5), "skip")
+
+    s = Scheduler(conn)
+    s.load()
+    assert s.tick() == 1 + 6 + 1  # run_all replays every minute, skip keeps only the on-time fire
+    assert _jobs(conn, "once") == ["once@20250601T120000Z"]
+    assert len(_jobs(conn, "all")) == 6
+    assert _jobs(conn, "skip") == ["skip@20250601T120000Z"]
+
+    # a restarted scheduler sees the advanced next_fire_at and enqueues nothing
+    again = Scheduler(conn)
+    again.load()
+    assert again.tick() == 0
+    assert again.seconds_until_next() == 60
+
+
+def test_long_downtime_catch_up_is_bounded(monkeypatch):
+    now = datetime(2025, 6, 1, 12, 0, 0, 500_000)
+    monkeypatch.setattr(sched, "now_ms", lambda: to_ms(now))
+    steps = []
+    real_cron_next = sched._cron_next
+    monkeypatch.setattr(sched, "_cron_next", lambda cron, after: steps.append(after) or real_cron_next(cron, after))
+    conn = get_connection()
+    # down for 30 days: 2.6M missed fires every second, 43k every minute
+    _add(conn, "every", now - timedelta(days=30), "run_all", interval=1)
+    _add(conn, "cron", now - timedelta(days=30), "run_all")
+    conn.execute("UPDATE schedules SET cron='* * * * *', interval_seconds=NULL WHERE id='cron'")
+    _add(conn, "daily", now - timedelta(days=30), "run_once")
+    conn.execute("UPDATE schedules SET cron='0 3 * * *', interval_seconds=NULL WHERE id='daily'")
+    conn.commit()
+
+    s = Scheduler(conn)
+    s.load()
+    assert s.tick() == 2 * sched.MAX_CATCHUP + 1
+    assert len(steps) < 4 * sched.MAX_CATCHUP
+
+    every = _jobs(conn, "every")
+    assert every[0] == "every@20250601T114321Z" and every[-1] == "every@20250601T120000Z"
+    assert _jobs(conn, "cron")[-1] == "cron@20250601T120000Z"
+    assert _jobs(conn, "daily") == ["daily@20250601T030000Z"]
+    next_fire = dict(conn.execute("SELECT id, next_fire_at FROM schedules").fetchall())
+    assert next_fire["every"] == to_ms(datetime(2025, 6, 1, 12, 0, 1, 500_000))
+    assert next_fire["cron"] == to_ms(datetime(2025, 6, 1, 12, 1))
+    assert next_fire["daily"] == to_ms(datetime(2025, 6, 2, 3, 0))
+
+
+def test_paused_schedule_does_not_fire_before_reload(monkeypatch):
+    now = datetime(2025, 6, 1, 12, 5, 0)
+    monkeypatch.setattr(sched, "now_ms", lambda: to_ms(now))
+    conn = get_connection()
+    _add(conn, "p", now)
+
+    s = Scheduler(conn)
+    s.load()
+    # paused after the scheduler last loaded it; next_fire_at is unchanged
+    conn.execute("UPDATE schedules SET enabled=0 WHERE id='p'")
+    conn.commit()
+    assert s.tick() == 0
+    assert _jobs(conn, "p") == []